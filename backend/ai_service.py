@@ -1,8 +1,92 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Union
 import json
+from transaction_columns import EXPENSE, INCOME, NAT, CategoryStats, TransactionColumns, as_columns, category_stats
+
+class FinancialProfile(NamedTuple):
+    """Everything the advisor and forecaster read, built in one pass over a user's transactions."""
+    transaction_count: int
+    monthly: pd.DataFrame  # month, expenses, income, savings (see prepare_data)
+    categories: CategoryStats  # absolute expense stats per category
+    total_income: float
+    total_expenses: float
+    savings_rate: float  # percent of income, 0 without income
+    
+    @classmethod
+    def from_columns(cls, columns: TransactionColumns) -> "FinancialProfile":
+        months = columns.months()
+        expense = columns.type_codes == EXPENSE
+        income = columns.type_codes == INCOME
+        expense_amounts = columns.amounts[expense]
+        income_amounts = columns.amounts[income]
+        
+        # Monthly series, skipping undated rows
+        expense_months = months[expense]
+        income_months = months[income]
+        expense_dated = expense_months != NAT
+        income_dated = income_months != NAT
+        monthly = monthly_frame(expense_months[expense_dated], expense_amounts[expense_dated],
+                                income_months[income_dated], income_amounts[income_dated])
+        
+        abs_expenses = np.abs(expense_amounts)
+        total_income = float(income_amounts.sum())
+        total_expenses = float(abs_expenses.sum())
+        savings_rate = (total_income - total_expenses) / total_income * 100 if total_income > 0 else 0.0
+        return cls(
+            transaction_count=columns.size,
+            monthly=monthly,
+            categories=category_stats(columns.category_codes[expense], abs_expenses, columns.categories),
+            total_income=total_income,
+            total_expenses=total_expenses,
+            savings_rate=savings_rate,
+        )
+    
+    @property
+    def category_breakdown(self) -> Dict[str, float]:
+        return dict(zip(self.categories.categories, self.categories.total.tolist()))
+    
+    def summary(self) -> Dict:
+        """The ``user_data`` dict AIAdvisor.chat_response expects."""
+        return {
+            "total_income": self.total_income,
+            "total_expenses": self.total_expenses,
+            "net_savings": self.total_income - self.total_expenses,
+            "savings_rate": self.savings_rate,
+            "category_breakdown": self.category_breakdown,
+        }
+
+def monthly_frame(expense_months: np.ndarray, expense_amounts: np.ndarray,
+                  income_months: np.ndarray, income_amounts: np.ndarray) -> pd.DataFrame:
+    """Monthly expense/income/savings frame for the months that have expenses."""
+    months, expense_index = np.unique(expense_months, return_inverse=True)
+    monthly_expenses = np.abs(np.bincount(expense_index, weights=expense_amounts, minlength=len(months)))
+    income_keys, income_index = np.unique(income_months, return_inverse=True)
+    income_totals = np.bincount(income_index, weights=income_amounts, minlength=len(income_keys))
+    
+    # Income only counts for months that also have expenses
+    monthly_income = np.zeros(len(months))
+    position = np.searchsorted(months, income_keys)
+    matched = position < len(months)
+    matched[matched] = months[position[matched]] == income_keys[matched]
+    monthly_income[position[matched]] = income_totals[matched]
+    
+    forecast_df = pd.DataFrame({
+        'month': pd.PeriodIndex.from_ordinals(months, freq='M'),
+        'expenses': monthly_expenses,
+        'income': monthly_income
+    })
+    forecast_df['savings'] = forecast_df['income'] - forecast_df['expenses']
+    return forecast_df
+
+Transactions = Union[List[Dict], TransactionColumns, FinancialProfile]
+
+def as_profile(transactions: Transactions) -> FinancialProfile:
+    """Accept a ready profile, TransactionColumns or the legacy list of dicts."""
+    if isinstance(transactions, FinancialProfile):
+        return transactions
+    return FinancialProfile.from_columns(as_columns(transactions))
 
 class FinancialForecaster:
     """AI-powered financial forecasting service using time series analysis."""
@@ -10,27 +94,23 @@ class FinancialForecaster:
     def __init__(self):
         self.model_trained = False
     
-    def prepare_data(self, transactions: List[Dict]) -> pd.DataFrame:
+    def prepare_data(self, transactions: Transactions) -> pd.DataFrame:
         """Prepare transaction data for forecasting."""
-        df = pd.DataFrame(transactions)
+        profile = as_profile(transactions)
+        if profile.transaction_count == 0:
+            return pd.DataFrame()
+        return profile.monthly.copy()
+    
+    def prepare_rollup_data(self, rollups: List[Dict]) -> pd.DataFrame:
+        """Prepare the same monthly frame as prepare_data from monthly rollup rows."""
+        df = pd.DataFrame(rollups)
         if df.empty:
             return df
         
-        df['date'] = pd.to_datetime(df['date'])
-        df['amount'] = pd.to_numeric(df['amount'])
-        
-        # Separate income and expenses
-        df_expenses = df[df['transaction_type'] == 'expense'].copy()
-        df_income = df[df['transaction_type'] == 'income'].copy()
-        
-        # Group by month
-        df_expenses['month'] = df_expenses['date'].dt.to_period('M')
-        df_income['month'] = df_income['date'].dt.to_period('M')
+        df['month'] = pd.PeriodIndex.from_fields(year=df['year'], month=df['month'], freq='M')
+        monthly_expenses = df[df['transaction_type'] == 'expense'].groupby('month')['total'].sum()
+        monthly_income = df[df['transaction_type'] == 'income'].groupby('month')['total'].sum()
         
-        monthly_expenses = df_expenses.groupby('month')['amount'].sum().abs()
-        monthly_income = df_income.groupby('month')['amount'].sum()
-        
-        # Combine into forecast dataframe
         forecast_df = pd.DataFrame({
             'month': monthly_expenses.index,
             'expenses': monthly_expenses.values,
@@ -41,92 +121,193 @@ class FinancialForecaster:
         
         return forecast_df
     
-    def simple_forecast(self, data: pd.DataFrame, periods: int = 6) -> List[Dict]:
+    def simple_forecast(self, data: Union[pd.DataFrame, FinancialProfile], periods: int = 6) -> List[Dict]:
         """Simple forecasting using moving averages and trends."""
+        if isinstance(data, FinancialProfile):
+            data = data.monthly
         if data.empty or len(data) < 2:
             return []
         
-        forecasts = []
-        
-        # Calculate trends
-        expense_trend = np.polyfit(range(len(data)), data['expenses'], 1)[0]
-        income_trend = np.polyfit(range(len(data)), data['income'], 1)[0]
-        
-        # Get recent averages
-        recent_expenses = data['expenses'].tail(3).mean()
-        recent_income = data['income'].tail(3).mean()
+        # One-row view over the batch kernel, with the usual random jitter
+        result = trend_forecast(
+            data['expenses'].to_numpy(dtype=float)[None, :],
+            data['income'].to_numpy(dtype=float)[None, :],
+            np.array([len(data)]),
+            periods,
+            rng=np.random
+        )
+        return forecast_rows(result, 0)
+    
+    def average_forecast(self, total_expenses: float, periods: int = 6) -> List[Dict]:
+        """Fallback projection for users without enough history for a trend."""
+        # Calculate average monthly expenses
+        avg_monthly_expenses = total_expenses / 6  # Assuming 6 months of data
         
+        forecasts = []
         for i in range(1, periods + 1):
-            # Predict with trend and some randomness
-            predicted_expenses = recent_expenses + (expense_trend * i) + np.random.normal(0, recent_expenses * 0.05)
-            predicted_income = recent_income + (income_trend * i) + np.random.normal(0, recent_income * 0.02)
-            predicted_savings = predicted_income - predicted_expenses
-            
-            # Calculate confidence (decreases over time)
-            confidence = max(95 - (i * 5), 60)
-            
             forecasts.append({
                 "period": f"Month +{i}",
-                "predicted_expenses": max(predicted_expenses, 0),
-                "predicted_income": max(predicted_income, 0),
-                "predicted_savings": predicted_savings,
-                "confidence": confidence
+                "predicted_expenses": avg_monthly_expenses * (1 + (i * 0.02)),  # 2% growth per month
+                "confidence": max(95 - (i * 3), 70)  # Decreasing confidence
             })
         
         return forecasts
     
-    def category_forecast(self, transactions: List[Dict], periods: int = 3) -> List[Dict]:
+    def batch_forecast(self, expenses: np.ndarray, income: np.ndarray, lengths: np.ndarray,
+                       periods: int = 6) -> Dict[str, np.ndarray]:
+        """Forecast many users' monthly series at once (see ``trend_forecast``)."""
+        return trend_forecast(expenses, income, lengths, periods)
+    
+    def category_forecast(self, transactions: Transactions, periods: int = 3) -> List[Dict]:
         """Forecast spending by category."""
-        df = pd.DataFrame(transactions)
-        if df.empty:
+        profile = as_profile(transactions)
+        if profile.transaction_count == 0:
             return []
         
-        df = df[df['transaction_type'] == 'expense'].copy()
-        df['amount'] = df['amount'].abs()
-        
-        # Group by category
-        category_spending = df.groupby('category')['amount'].agg(['mean', 'std', 'count']).fillna(0)
+        stats = profile.categories
         
         forecasts = []
-        for category, stats in category_spending.iterrows():
-            if stats['count'] > 0:
+        for category, mean, count in zip(stats.categories, stats.mean.tolist(), stats.count.tolist()):
+            if count > 0:
                 # Simple forecast with trend
-                predicted_amount = stats['mean'] * (1 + np.random.uniform(-0.1, 0.1))
-                confidence = min(90, stats['count'] * 10)  # More data = higher confidence
+                predicted_amount = mean * (1 + np.random.uniform(-0.1, 0.1))
+                confidence = min(90, count * 10)  # More data = higher confidence
                 
                 forecasts.append({
                     "category": category,
-                    "current_avg": stats['mean'],
+                    "current_avg": mean,
                     "predicted_amount": predicted_amount,
-                    "change_percent": ((predicted_amount - stats['mean']) / stats['mean']) * 100,
+                    "change_percent": ((predicted_amount - mean) / mean) * 100,
                     "confidence": confidence
                 })
         
         return sorted(forecasts, key=lambda x: x['predicted_amount'], reverse=True)
 
+# Two-sided 95% Student t quantiles for 1..30 degrees of freedom
+T_975 = np.array([12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+                  2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+                  2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042])
+Z_975 = 1.959964
+
+def t_quantile_975(dof: np.ndarray) -> np.ndarray:
+    """Two-sided 95% t quantile per degrees of freedom; NaN below one."""
+    dof = np.asarray(dof, dtype=float)
+    safe = np.maximum(dof, 1)
+    # Cornish-Fisher expansion past the table, within 0.001 from 30 dof up
+    z = Z_975
+    expansion = z + (z ** 3 + z) / (4 * safe) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * safe ** 2)
+    table = T_975[np.clip(safe.astype(np.int64), 1, len(T_975)) - 1]
+    return np.where(dof < 1, np.nan, np.where(dof <= len(T_975), table, expansion))
+
+def optional_float(value) -> Optional[float]:
+    """A float for JSON and the database, with NaN (no value) as None."""
+    return None if np.isnan(value) else float(value)
+
+def trend_forecast(expenses: np.ndarray, income: np.ndarray, lengths: np.ndarray,
+                   periods: int = 6, rng=None) -> Dict[str, np.ndarray]:
+    """Vectorized trend + recent-average forecast for a batch of monthly series.
+    
+    ``expenses`` and ``income`` are (users, months) arrays holding left-aligned
+    series padded to a common width; ``lengths`` gives each row's number of
+    valid months and must be at least 2. Per row this matches the old
+    per-user loop: the recent value is the mean of the last three months and
+    the trend is the least-squares slope over the series, both in closed form.
+    ``rng`` (e.g. ``np.random``) adds the per-month jitter simple_forecast has
+    always applied; batch runs leave it out so results are reproducible.
+    
+    Returns (users, periods) arrays, clipped at zero, plus 95% prediction
+    intervals around the returned point: the trend line's residual spread
+    times the t quantile for n - 2 degrees of freedom, scaled by the variance
+    of that point (recent mean plus slope times horizon) for a new month.
+    Rows with two months leave no residual degrees of freedom, so their
+    bounds are NaN.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n = lengths.astype(float)
+    width = expenses.shape[1]
+    mask = np.arange(width)[None, :] < lengths[:, None]
+    x = np.arange(width, dtype=float)
+    horizon = np.arange(1, periods + 1, dtype=float)
+    
+    sum_x = n * (n - 1) / 2
+    s_xx = (n - 1) * n * (2 * n - 1) / 6 - sum_x ** 2 / n
+    
+    recent_index = lengths[:, None] - 1 - np.arange(3)[None, :]
+    recent_mask = recent_index >= 0
+    recent_index = np.clip(recent_index, 0, None)
+    recent_count = recent_mask.sum(axis=1).astype(float)
+    
+    # Var(recent mean + slope * h) over the residual variance; the recent months
+    # sit (n - k) / 2 past the mean x, which correlates the two terms
+    h = horizon[None, :]
+    leverage = (1 + 1 / recent_count[:, None] + h ** 2 / s_xx[:, None]
+                + h * (n - recent_count)[:, None] / s_xx[:, None])
+    t_quantile = t_quantile_975(n - 2)
+    
+    def project(values: np.ndarray, jitter: float):
+        y = np.where(mask, values, 0.0)
+        sum_y = y.sum(axis=1)
+        sum_xy = (y * x).sum(axis=1)
+        slope = (sum_xy - sum_x * sum_y / n) / s_xx
+        intercept = (sum_y - slope * sum_x) / n
+        
+        sse = np.maximum((y * y).sum(axis=1) - intercept * sum_y - slope * sum_xy, 0)
+        dof = n - 2
+        residual_std = np.sqrt(np.divide(sse, dof, out=np.zeros_like(sse), where=dof > 0))
+        
+        recent = np.take_along_axis(y, recent_index, axis=1)
+        recent_mean = (recent * recent_mask).sum(axis=1) / recent_count
+        
+        point = recent_mean[:, None] + slope[:, None] * horizon[None, :]
+        if rng is not None:
+            point = point + rng.normal(0, np.abs(recent_mean)[:, None] * jitter, point.shape)
+        half_width = t_quantile[:, None] * residual_std[:, None] * np.sqrt(leverage)
+        return np.maximum(point, 0), half_width
+    
+    expenses_point, expenses_width = project(expenses, 0.05)
+    income_point, income_width = project(income, 0.02)
+    
+    return {
+        "predicted_expenses": expenses_point,
+        "predicted_income": income_point,
+        "predicted_savings": income_point - expenses_point,
+        "expenses_lower": np.maximum(expenses_point - expenses_width, 0),
+        "expenses_upper": expenses_point + expenses_width,
+        "income_lower": np.maximum(income_point - income_width, 0),
+        "income_upper": income_point + income_width,
+        # Confidence decreases over time
+        "confidence": np.maximum(95 - horizon * 5, 60),
+    }
+
+def forecast_rows(result: Dict[str, np.ndarray], row: int) -> List[Dict]:
+    """Format one user's row of a trend_forecast result as per-month dicts."""
+    periods = result["confidence"].shape[0]
+    return [
+        {
+            "period": f"Month +{i + 1}",
+            **{key: optional_float(values[row, i]) for key, values in result.items() if key != "confidence"},
+            "confidence": int(result["confidence"][i]),
+        }
+        for i in range(periods)
+    ]
+
 class AIAdvisor:
     """AI-powered financial advisor for personalized recommendations."""
     
     def __init__(self):
         self.forecaster = FinancialForecaster()
     
-    def analyze_spending_patterns(self, transactions: List[Dict]) -> List[Dict]:
+    def analyze_spending_patterns(self, transactions: Transactions) -> List[Dict]:
         """Analyze spending patterns and provide insights."""
-        if not transactions:
+        profile = as_profile(transactions)
+        if profile.transaction_count == 0:
             return []
         
-        df = pd.DataFrame(transactions)
         insights = []
         
-        # Calculate monthly spending
-        df['date'] = pd.to_datetime(df['date'])
-        df['month'] = df['date'].dt.to_period('M')
-        
-        expenses = df[df['transaction_type'] == 'expense'].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
         # Category analysis
-        category_spending = expenses.groupby('category')['amount'].sum().sort_values(ascending=False)
+        stats = profile.categories
+        category_spending = pd.Series(stats.total, index=stats.categories).sort_values(ascending=False)
         total_expenses = category_spending.sum()
         
         if total_expenses > 0:
@@ -156,18 +337,14 @@ class AIAdvisor:
         
         return insights
     
-    def generate_budget_recommendations(self, transactions: List[Dict], income: float) -> Dict:
+    def generate_budget_recommendations(self, transactions: Transactions, income: float) -> Dict:
         """Generate budget recommendations based on spending patterns."""
-        if not transactions:
+        profile = as_profile(transactions)
+        if profile.transaction_count == 0:
             return {"recommendations": []}
         
-        df = pd.DataFrame(transactions)
-        expenses = df[df['transaction_type'] == 'expense'].copy()
-        expenses['amount'] = expenses['amount'].abs()
-        
         # Calculate category averages
-        category_avg = expenses.groupby('category')['amount'].mean()
-        total_avg_expenses = category_avg.sum()
+        category_avg = dict(zip(profile.categories.categories, profile.categories.mean.tolist()))
         
         recommendations = []
         
@@ -197,8 +374,10 @@ class AIAdvisor:
             "recommendations": recommendations
         }
     
-    def chat_response(self, message: str, user_data: Dict) -> str:
+    def chat_response(self, message: str, user_data: Union[Dict, FinancialProfile]) -> str:
         """Generate AI chat response based on user message and financial data."""
+        if isinstance(user_data, FinancialProfile):
+            user_data = user_data.summary()
         message_lower = message.lower()
         
         # Extract key financial metrics
@@ -0,0 +1,346 @@
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import numpy as np
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+from models import AIInsight, CategoryBaseline, Transaction
+
+ANOMALY_SOURCE = "anomaly"
+# Robust z-score of the log amount, |log x - median| / (1.4826 * MAD), at or above which an expense is flagged
+ANOMALY_THRESHOLD = float(os.getenv("ANOMALY_THRESHOLD", "3.5"))
+# Floor on the log-amount MAD: amounts that barely vary would otherwise make tiny changes look extreme
+ANOMALY_MIN_MAD = float(os.getenv("ANOMALY_MIN_MAD", "0.1"))
+# An expense must also be at least this many times the typical amount to be flagged
+ANOMALY_MIN_RATIO = float(os.getenv("ANOMALY_MIN_RATIO", "1.5"))
+# Expenses a category needs before anything in it is flagged
+ANOMALY_MIN_COUNT = int(os.getenv("ANOMALY_MIN_COUNT", "5"))
+# Weight of the newest expense in the decayed median/MAD (older ones fade by 1 - decay per expense)
+ANOMALY_DECAY = float(os.getenv("ANOMALY_DECAY", "0.05"))
+# Most alerts raised by one write, so a bulk import can't flood the insights feed
+ANOMALY_MAX_ALERTS = int(os.getenv("ANOMALY_MAX_ALERTS", "10"))
+MAD_SCALE = 1.4826  # makes the MAD comparable to a standard deviation for normal data
+WELFORD_MAD_CAP = 1.5
+LOAD_CHUNK_SIZE = 10000
+
+BaselineKey = Tuple[int, str]
+
+def _expense(transaction) -> Optional[Tuple[BaselineKey, float, str]]:
+    if isinstance(transaction, Mapping):
+        fields = (transaction["user_id"], transaction["category"], transaction["transaction_type"],
+                  transaction["amount"], transaction.get("description"))
+    else:
+        fields = (transaction.user_id, transaction.category, transaction.transaction_type,
+                  transaction.amount, transaction.description)
+    user_id, category, transaction_type, amount, description = fields
+    if transaction_type != "expense":
+        return None
+    return (user_id, category), abs(amount), description or ""
+
+class RunningStats:
+    """Working copy of a CategoryBaseline's numbers; plain attributes keep per-row updates cheap."""
+    __slots__ = ("count", "mean", "m2", "median", "mad")
+    FIELDS = ("count", "mean", "m2", "median", "mad")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0, median: float = 0.0, mad: float = 0.0):
+        self.count, self.mean, self.m2, self.median, self.mad = count, mean, m2, median, mad
+
+    @classmethod
+    def of(cls, baseline: CategoryBaseline) -> "RunningStats":
+        return cls(*(getattr(baseline, field) for field in cls.FIELDS))
+
+    def store(self, baseline: CategoryBaseline):
+        for field in self.FIELDS:
+            setattr(baseline, field, getattr(self, field))
+
+def log_amount(amount: float) -> float:
+    """Scale for the median/MAD: spending is right-skewed, so compare ratios rather than differences."""
+    return math.log1p(amount)
+
+def typical_amount(baseline: RunningStats) -> float:
+    return math.expm1(baseline.median)
+
+def anomaly_score(baseline: RunningStats, amount: float) -> Optional[float]:
+    """How unusually high an expense is for its category, or None without enough history.
+
+    Uses the robust z-score of the log amount against the decayed
+    median/MAD (see ``spread``).
+    """
+    value = log_amount(amount)
+    if baseline.count < ANOMALY_MIN_COUNT or value <= baseline.median:
+        return None
+    return (value - baseline.median) / (MAD_SCALE * spread(baseline))
+
+def spread(baseline: RunningStats) -> float:
+    """The log-amount MAD used for scoring, with two floors.
+
+    The stochastic MAD starts at 0 and shrinks while amounts are steady,
+    so it is raised to the MAD implied by the exact Welford coefficient of
+    variation (about the standard deviation of the log amount) and to
+    ``ANOMALY_MIN_MAD``. Past warm-up the Welford floor is capped at
+    ``WELFORD_MAD_CAP`` times the MAD, since one huge expense inflates the
+    variance and would otherwise mask the next one.
+    """
+    welford = 0.0
+    if baseline.count > 1 and baseline.mean > 0:
+        welford = math.sqrt(baseline.m2 / (baseline.count - 1)) / baseline.mean / MAD_SCALE
+        if baseline.count >= 1 / ANOMALY_DECAY:
+            welford = min(welford, WELFORD_MAD_CAP * baseline.mad)
+    return max(baseline.mad, welford, ANOMALY_MIN_MAD)
+
+def is_anomaly(baseline: RunningStats, amount: float) -> Optional[float]:
+    """The anomaly score if an expense should be flagged, else None.
+
+    Needs both a high score and an amount at least ``ANOMALY_MIN_RATIO``
+    times the typical one, so rent going from 15000 to 15500 stays quiet.
+    """
+    score = anomaly_score(baseline, amount)
+    if score is None or score < ANOMALY_THRESHOLD:
+        return None
+    typical = typical_amount(baseline) or baseline.mean
+    if typical > 0 and amount < ANOMALY_MIN_RATIO * typical:
+        return None
+    return score
+
+def add_observation(baseline: RunningStats, amount: float, decay: float = ANOMALY_DECAY):
+    """Fold one expense into a baseline in O(1).
+
+    Mean and variance of the amount are exact (Welford). The median and
+    MAD of the log amount follow a stochastic approximation that drifts
+    towards the exponentially decayed median, taking steps of the current
+    ``spread`` times a rate of 1/count during warm-up and ``decay`` after.
+    """
+    add_moments(baseline, amount)
+    value = log_amount(amount)
+    if baseline.count == 1:
+        baseline.median, baseline.mad = value, 0.0
+    else:
+        deviation = value - baseline.median
+        step = max(decay, 1.0 / baseline.count) * spread(baseline)
+        baseline.median += math.copysign(step, deviation) if deviation else 0.0
+        excess = abs(deviation) - baseline.mad
+        baseline.mad = max(baseline.mad + (math.copysign(step, excess) if excess else 0.0), 0.0)
+
+def add_moments(baseline: RunningStats, amount: float):
+    """Fold one amount into the exact mean and variance only."""
+    count = baseline.count + 1
+    delta = amount - baseline.mean
+    baseline.mean += delta / count
+    baseline.m2 += delta * (amount - baseline.mean)
+    baseline.count = count
+
+def remove_observation(baseline: RunningStats, amount: float):
+    """Take a deleted expense back out of the mean and variance.
+
+    The decayed median/MAD cannot be unwound; a single old value barely
+    moves them and they keep adapting to new expenses.
+    """
+    count = baseline.count - 1
+    if count <= 0:
+        baseline.count, baseline.mean, baseline.m2 = 0, 0.0, 0.0
+        return
+    delta = amount - baseline.mean
+    baseline.mean -= delta / count
+    baseline.m2 = max(baseline.m2 - delta * (amount - baseline.mean), 0.0)
+    baseline.count = count
+
+def alert_row(user_id: int, category: str, amount: float, description: str, baseline: RunningStats,
+              score: float, created_at: datetime) -> Dict:
+    typical = typical_amount(baseline) or baseline.mean
+    detail = f" at {description}" if description else ""
+    if typical > 0:
+        message = (f"₹{amount:,.0f}{detail} is {amount / typical:.1f}x your typical {category} "
+                   f"expense of ₹{typical:,.0f}.")
+    else:
+        message = f"₹{amount:,.0f}{detail} is far above your usual {category} spending."
+    return {
+        "user_id": user_id,
+        "source": ANOMALY_SOURCE,
+        "insight_type": "alert",
+        "title": f"Unusual {category} Expense",
+        "message": message,
+        "confidence_score": round(min(99.0, 50.0 + 10.0 * score), 1),
+        "is_read": False,
+        "created_at": created_at,
+    }
+
+def _load_baselines(db: Session, keys: List[BaselineKey]) -> Dict[BaselineKey, CategoryBaseline]:
+    """Lock the baselines for ``keys``, creating any that don't exist yet."""
+    def locked(wanted):
+        query = db.query(CategoryBaseline).filter(
+            tuple_(CategoryBaseline.user_id, CategoryBaseline.category).in_(wanted)
+        ).with_for_update()
+        return {(baseline.user_id, baseline.category): baseline for baseline in query}
+
+    baselines = locked(keys)
+    missing = [key for key in keys if key not in baselines]
+    if missing:
+        rows = [{"user_id": user_id, "category": category, "count": 0, "mean": 0.0, "m2": 0.0,
+                 "median": 0.0, "mad": 0.0} for user_id, category in missing]
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            # Concurrent writers may create the same baseline; the loser keeps the winner's row
+            db.execute(dialect_insert(CategoryBaseline).on_conflict_do_nothing(), rows)
+            baselines.update(locked(missing))
+        else:
+            for row in rows:
+                baseline = CategoryBaseline(**row)
+                db.add(baseline)
+                baselines[(row["user_id"], row["category"])] = baseline
+    return baselines
+
+def apply_transactions(db: Session, transactions: Iterable, sign: int = 1) -> int:
+    """Score added expenses against their category baselines, then update the baselines.
+
+    Each expense is checked against the statistics from before it, so an
+    outlier cannot hide itself. The batch costs one locking read of its
+    (user, category) baselines plus constant work per transaction.
+    Alerts go to ai_insights in the caller's database transaction.
+    Returns the number of alerts raised.
+    """
+    expenses = [expense for expense in map(_expense, transactions) if expense is not None]
+    if not expenses:
+        return 0
+    baselines = _load_baselines(db, list(dict.fromkeys(key for key, _, _ in expenses)))
+    stats = {key: RunningStats.of(baseline) for key, baseline in baselines.items()}
+
+    alerts = []
+    created_at = datetime.utcnow()
+    for key, amount, description in expenses:
+        running = stats[key]
+        if sign < 0:
+            remove_observation(running, amount)
+            continue
+        score = is_anomaly(running, amount)
+        if score is not None and len(alerts) < ANOMALY_MAX_ALERTS:
+            alerts.append(alert_row(key[0], key[1], amount, description, running, score, created_at))
+        add_observation(running, amount)
+    for key, running in stats.items():
+        running.store(baselines[key])
+    if alerts:
+        db.execute(insert(AIInsight), alerts)
+    return len(alerts)
+
+def apply_update(db: Session, before, after):
+    """Move an edited expense between baselines without scoring it again.
+
+    Edits that keep the amount, category and type touch nothing. Otherwise
+    the old amount leaves its baseline's mean and variance and the new one
+    joins its baseline's; the decayed median/MAD are left alone, as an edit
+    is not new spending and must not pull them or raise an alert.
+    """
+    old, new = _expense(before), _expense(after)
+    if old is None and new is None or old is not None and new is not None and old[:2] == new[:2]:
+        return
+    keys = list(dict.fromkeys(expense[0] for expense in (old, new) if expense is not None))
+    baselines = _load_baselines(db, keys)
+    stats = {key: RunningStats.of(baseline) for key, baseline in baselines.items()}
+    if old is not None:
+        remove_observation(stats[old[0]], old[1])
+    if new is not None:
+        add_moments(stats[new[0]], new[1])
+    for key, running in stats.items():
+        running.store(baselines[key])
+
+def weighted_medians(groups: np.ndarray, values: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+    """Weighted median of ``values`` within each group code, all groups at once."""
+    order = np.lexsort((values, groups))
+    groups, values, weights = groups[order], values[order], weights[order]
+    cumulative = np.cumsum(weights)
+    totals = np.bincount(groups, weights=weights, minlength=size)
+    group_end = np.cumsum(totals)
+    before = (group_end - totals)[groups]
+    # First value in each group whose cumulative weight reaches half the group's weight
+    reached = np.flatnonzero(cumulative - before >= totals[groups] / 2 - 1e-12)
+    present, first = np.unique(groups[reached], return_index=True)
+    medians = np.zeros(size)
+    medians[present] = values[reached[first]]
+    return medians
+
+def baseline_rows(user_ids: np.ndarray, category_codes: np.ndarray, categories: List[str],
+                  amounts: np.ndarray, decay: float = ANOMALY_DECAY) -> List[Dict]:
+    """Baselines for expense amounts given oldest first, in one vectorized pass.
+
+    Mean and variance are exact. The median and MAD of the log amounts
+    are the exact exponentially weighted ones (newest weight 1, each older
+    expense ``1 - decay`` times the next), which the online updates
+    approximate.
+    """
+    if len(amounts) == 0:
+        return []
+    keys, groups = np.unique(user_ids * len(categories) + category_codes, return_inverse=True)
+    size = len(keys)
+
+    count = np.bincount(groups, minlength=size)
+    mean = np.bincount(groups, weights=amounts, minlength=size) / count
+    m2 = np.bincount(groups, weights=(amounts - mean[groups]) ** 2, minlength=size)
+
+    # Age of each expense within its group: 0 for the newest
+    order = np.argsort(groups, kind="stable")
+    position = np.empty(len(amounts), np.int64)
+    position[order] = np.arange(len(amounts)) - (np.cumsum(count) - count)[groups[order]]
+    weights = (1.0 - decay) ** (count[groups] - 1 - position)
+
+    values = np.log1p(amounts)
+    median = weighted_medians(groups, values, weights, size)
+    mad = weighted_medians(groups, np.abs(values - median[groups]), weights, size)
+    return [
+        {"user_id": int(key // len(categories)), "category": categories[key % len(categories)],
+         "count": int(count[i]), "mean": float(mean[i]), "m2": float(m2[i]),
+         "median": float(median[i]), "mad": float(mad[i])}
+        for i, key in enumerate(keys.tolist())
+    ]
+
+def rebuild(db: Session, user_id: Optional[int] = None, chunk_size: int = LOAD_CHUNK_SIZE) -> int:
+    """Recompute baselines from raw expense history for one user, or everyone.
+
+    Runs inside the caller's transaction and returns the number of
+    baselines written. No alerts are raised for past expenses.
+    """
+    query = select(Transaction.user_id, Transaction.category, Transaction.amount).where(
+        Transaction.transaction_type == "expense"
+    ).order_by(Transaction.date, Transaction.id)
+    clear = delete(CategoryBaseline)
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+        clear = clear.where(CategoryBaseline.user_id == user_id)
+
+    categories: Dict[str, int] = {}
+    user_chunks, category_chunks, amount_chunks = [], [], []
+    for rows in db.execute(query.execution_options(yield_per=chunk_size)).partitions():
+        row_users, row_categories, row_amounts = zip(*rows)
+        user_chunks.append(np.array(row_users, dtype=np.int64))
+        category_chunks.append(np.fromiter(
+            (categories.setdefault(category, len(categories)) for category in row_categories),
+            np.int64, len(rows)))
+        amount_chunks.append(np.abs(np.array(row_amounts, dtype=np.float64)))
+
+    db.execute(clear)
+    if not amount_chunks:
+        return 0
+    rows = baseline_rows(np.concatenate(user_chunks), np.concatenate(category_chunks), list(categories),
+                         np.concatenate(amount_chunks))
+    db.execute(insert(CategoryBaseline), rows)
+    return len(rows)
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Rebuild per-category anomaly baselines from raw transactions.")
+    parser.add_argument("--user-id", type=int, help="only rebuild this user (default: everyone)")
+    args = parser.parse_args()
+
+    CategoryBaseline.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        written = rebuild(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt {written} category baselines")
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -7,6 +8,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from models import User
 from database import get_database
+from cache import LRUCache
 import os
 
 # Security configuration
@@ -17,6 +19,30 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+class CurrentUser(NamedTuple):
+    """Identity fields handlers need from the authenticated user."""
+    id: int
+    username: str
+    is_active: bool
+
+# Verified token -> CurrentUser, so authenticated requests skip the users table.
+# Entries never outlive the token's own expiry; other workers see a deactivation
+# or password change within AUTH_CACHE_TTL seconds.
+user_cache = LRUCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+)
+
+def cache_user(token: str, user: User, expires: Optional[float] = None) -> CurrentUser:
+    """Cache the identity for a token that has just been verified."""
+    identity = CurrentUser(user.id, user.username, user.is_active)
+    user_cache.set(token, identity, ttl=expires - time.time() if expires is not None else None)
+    return identity
+
+def invalidate_user(user_id: int) -> int:
+    """Forget every cached token for a user, e.g. after deactivation or a password change."""
+    return user_cache.discard_where(lambda token, identity: identity.id == user_id)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -40,7 +66,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_database)
-) -> User:
+) -> CurrentUser:
     """Get current authenticated user."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,19 +74,25 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    identity = user_cache.get(credentials.credentials)
+    if identity is None:
+        try:
+            payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise credentials_exception
+        identity = cache_user(credentials.credentials, user, payload.get("exp"))
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    if not identity.is_active:
         raise credentials_exception
     
-    return user
+    return identity
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate user with username and password."""
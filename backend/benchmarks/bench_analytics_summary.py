@@ -0,0 +1,90 @@
+"""Regression benchmark for the /analytics/summary aggregation.
+
+Seeds a throwaway SQLite database with one user's history at several sizes and
+times the monthly-rollup read and the grouped SQL aggregate against the old
+load-everything-into-Python approach. Prints one JSON object per size so runs can be diffed.
+
+    python benchmarks/bench_analytics_summary.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_summary_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rollup_service  # noqa: E402
+from main import SessionLocal, Transaction, summarize_transactions  # noqa: E402
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities",
+              "Entertainment", "Healthcare", "Education", "Investment"]
+
+def seed(db, user_id: int, count: int):
+    rng = random.Random(user_id)
+    start = datetime(2020, 1, 1)
+    rows = []
+    for i in range(count):
+        is_income = rng.random() < 0.1
+        rows.append({
+            "user_id": user_id,
+            "description": "Salary Deposit" if is_income else "Card purchase",
+            "amount": rng.uniform(20000, 90000) if is_income else -rng.uniform(50, 5000),
+            "category": "Income" if is_income else rng.choice(CATEGORIES),
+            "transaction_type": "income" if is_income else "expense",
+            "date": start + timedelta(minutes=rng.randrange(60 * 24 * 365 * 5)),
+            "is_ai_categorized": False,
+        })
+    db.bulk_insert_mappings(Transaction, rows)
+    rollup_service.rebuild(db, user_id)
+    db.commit()
+
+def python_summary(db, user_id: int) -> dict:
+    """The pre-aggregation implementation, kept as the baseline."""
+    transactions = db.query(Transaction).filter(Transaction.user_id == user_id).all()
+    total_income = sum(t.amount for t in transactions if t.transaction_type == "income")
+    total_expenses = sum(abs(t.amount) for t in transactions if t.transaction_type == "expense")
+    categories = {}
+    for t in transactions:
+        if t.transaction_type == "expense":
+            categories[t.category] = categories.get(t.category, 0) + abs(t.amount)
+    return {"total_income": total_income, "total_expenses": total_expenses, "category_breakdown": categories}
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for user_id, size in enumerate(args.sizes, start=1):
+        db = SessionLocal()
+        try:
+            seed(db, user_id, size)
+            rollup_seconds = best_of(lambda: rollup_service.summarize(db, user_id), args.repeat)
+            sql_seconds = best_of(lambda: summarize_transactions(db, user_id), args.repeat)
+            python_seconds = best_of(lambda: (python_summary(db, user_id), db.expunge_all()), args.repeat)
+        finally:
+            db.close()
+        print(json.dumps({
+            "benchmark": "analytics_summary",
+            "rows": size,
+            "rollup_ms": round(rollup_seconds * 1000, 3),
+            "sql_aggregate_ms": round(sql_seconds * 1000, 3),
+            "python_loop_ms": round(python_seconds * 1000, 3),
+        }))
+
+if __name__ == "__main__":
+    main()
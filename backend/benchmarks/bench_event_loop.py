@@ -0,0 +1,85 @@
+"""Concurrency benchmark: does login traffic stall the event loop?
+
+Drives main.app in-process over ASGI and samples GET / latency, first on an
+idle app and then while several clients log in back to back. If bcrypt or
+database calls ran on the event loop, GET / p99 would climb to roughly one
+bcrypt hash per concurrent login. Prints one JSON object per phase.
+
+    python benchmarks/bench_event_loop.py --logins 8 --seconds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench_loop_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from main import app  # noqa: E402
+
+CREDENTIALS = {"username": "bench", "password": "bench-password"}
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def probe_root(client: httpx.AsyncClient, stop: asyncio.Event, interval: float):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def login_loop(client: httpx.AsyncClient, stop: asyncio.Event):
+    completed = 0
+    while not stop.is_set():
+        response = await client.post("/auth/login", json=CREDENTIALS)
+        response.raise_for_status()
+        completed += 1
+    return completed
+
+async def run_phase(client: httpx.AsyncClient, logins: int, seconds: float, interval: float) -> dict:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_root(client, stop, interval))
+    workers = [asyncio.create_task(login_loop(client, stop)) for _ in range(logins)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    latencies = await probe
+    completed = sum(await asyncio.gather(*workers))
+    return {
+        "benchmark": "event_loop",
+        "concurrent_logins": logins,
+        "root_requests": len(latencies),
+        "root_p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "root_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "root_max_ms": round(max(latencies) * 1000, 3),
+        "logins_per_second": round(completed / seconds, 1),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login clients in the loaded phase")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each phase")
+    parser.add_argument("--interval", type=float, default=0.005, help="pause between GET / probes")
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/auth/register", json={
+            **CREDENTIALS, "email": "bench@example.com", "full_name": "Bench User"
+        })
+        response.raise_for_status()
+        for logins in (0, args.logins):
+            print(json.dumps(await run_phase(client, logins, args.seconds, args.interval)))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,230 @@
+"""End-to-end load test: concurrent users against main.app over ASGI.
+
+Runs the app in-process (lifespan included) behind httpx's ASGITransport,
+registers --users accounts with synthetic histories (see synthetic.py), then
+sweeps the --concurrency levels. At each level every virtual user loops over
+a weighted mix of register, login, list/post transactions, summary, forecast
+and chat for --seconds. Prints one JSON object per route and level with
+throughput and p50/p95/p99 latency, plus how late a 5 ms timer fired on the
+event loop (sync work inside ``async def`` routes shows up there).
+
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL points elsewhere
+(for example a local or embedded Postgres).
+
+    python benchmarks/bench_load.py --concurrency 1 8 32 --seconds 5
+    python benchmarks/bench_load.py --mix list=1,summary=1 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+_db_dir = tempfile.mkdtemp(prefix="bench_load_")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+import anomaly_service  # noqa: E402
+import rollup_service  # noqa: E402
+from main import SessionLocal, Transaction, app, engine  # noqa: E402
+from synthetic import generate_transactions  # noqa: E402
+
+DEFAULT_MIX = "register=1,login=4,list=30,post=15,summary=20,forecast=10,chat=20"
+CHAT_MESSAGES = ["What should my budget be?", "How can I save more?", "Where should I invest?",
+                 "Show my spending"]
+PASSWORD = "bench-password"
+LAG_INTERVAL = 0.005
+
+class VirtualUser:
+    """One account: its credentials, bearer token and a private random stream."""
+
+    def __init__(self, username: str, token: str, seed: str):
+        self.username = username
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rng = random.Random(seed)
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def register_user(client: httpx.AsyncClient, username: str) -> int:
+    response = await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": PASSWORD, "full_name": username,
+    })
+    response.raise_for_status()
+    return response.json()["user_id"]
+
+async def login(client: httpx.AsyncClient, username: str) -> str:
+    response = await client.post("/auth/login", json={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+def seed_history(user_ids: List[int], history: int, seed: int):
+    """Bulk-insert synthetic transactions for the registered users and rebuild their derived tables."""
+    db = SessionLocal()
+    try:
+        for user_id in user_ids:
+            db.execute(insert(Transaction), generate_transactions(user_id, history, seed))
+            rollup_service.rebuild(db, user_id)
+            anomaly_service.rebuild(db, user_id)
+        db.commit()
+    finally:
+        db.close()
+
+# Each operation returns (route label, response); the label groups latencies
+async def op_register(client, user: VirtualUser):
+    username = f"{user.username}-{user.rng.getrandbits(48):x}"
+    return "POST /auth/register", await client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": PASSWORD, "full_name": username,
+    })
+
+async def op_login(client, user: VirtualUser):
+    return "POST /auth/login", await client.post("/auth/login", json={"username": user.username,
+                                                                       "password": PASSWORD})
+
+async def op_list(client, user: VirtualUser):
+    return "GET /transactions", await client.get("/transactions", params={"limit": 100}, headers=user.headers)
+
+async def op_post(client, user: VirtualUser):
+    is_income = user.rng.random() < 0.05
+    return "POST /transactions", await client.post("/transactions", headers=user.headers, json={
+        "description": "SALARY CREDIT" if is_income else user.rng.choice(["UPI/SWIGGY*ORDER", "UBER INDIA TRIP",
+                                                                          "AMAZON PAY INDIA PURCHASE"]),
+        "amount": round(user.rng.uniform(30000, 90000) if is_income else -user.rng.lognormvariate(6, 0.8), 2),
+        "category": "Income" if is_income else "Shopping",
+        "transaction_type": "income" if is_income else "expense",
+    })
+
+async def op_summary(client, user: VirtualUser):
+    return "GET /analytics/summary", await client.get("/analytics/summary", headers=user.headers)
+
+async def op_forecast(client, user: VirtualUser):
+    return "GET /ai/forecast", await client.get("/ai/forecast", headers=user.headers)
+
+async def op_chat(client, user: VirtualUser):
+    return "POST /ai/chat", await client.post("/ai/chat", headers=user.headers,
+                                              json={"message": user.rng.choice(CHAT_MESSAGES)})
+
+OPERATIONS = {
+    "register": op_register, "login": op_login, "list": op_list, "post": op_post,
+    "summary": op_summary, "forecast": op_forecast, "chat": op_chat,
+}
+
+async def user_loop(client: httpx.AsyncClient, user: VirtualUser, mix: Dict[str, float],
+                    stop: asyncio.Event, samples: Dict[str, List[float]], errors: Dict[str, int]):
+    names, weights = list(mix), list(mix.values())
+    while not stop.is_set():
+        operation = OPERATIONS[user.rng.choices(names, weights)[0]]
+        start = time.perf_counter()
+        route, response = await operation(client, user)
+        samples[route].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[route] += 1
+
+async def loop_lag(stop: asyncio.Event) -> List[float]:
+    """How late a short sleep wakes up; blocking calls on the event loop inflate it."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(time.perf_counter() - start - LAG_INTERVAL)
+    return lags
+
+def latency_row(concurrency: int, route: str, latencies: List[float], errors: int, seconds: float) -> Dict:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "benchmark": "load",
+        "concurrency": concurrency,
+        "route": route,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+async def run_level(client: httpx.AsyncClient, users: List[VirtualUser], concurrency: int,
+                    mix: Dict[str, float], seconds: float) -> List[Dict]:
+    stop = asyncio.Event()
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lag = asyncio.create_task(loop_lag(stop))
+    # More virtual users than accounts simply share accounts
+    workers = [asyncio.create_task(user_loop(client, users[i % len(users)], mix, stop, samples, errors))
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - started
+    lags = await lag
+
+    rows = [latency_row(concurrency, route, samples[route], errors[route], elapsed) for route in sorted(samples)]
+    everything = [latency for route in samples for latency in samples[route]]
+    overall = (latency_row(concurrency, "all", everything, sum(errors.values()), elapsed) if everything
+               else {"benchmark": "load", "concurrency": concurrency, "route": "all", "requests": 0})
+    if lags:
+        overall["loop_lag_p99_ms"] = round(float(np.percentile(lags, 99)) * 1000, 3)
+        overall["loop_lag_max_ms"] = round(max(lags) * 1000, 3)
+    return rows + [overall]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64],
+                        help="concurrent virtual users per level")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each level")
+    parser.add_argument("--users", type=int, default=16, help="accounts created up front")
+    parser.add_argument("--history", type=int, default=2000, help="synthetic transactions per account")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights, e.g. list=3,post=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write every level's results as JSON to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            usernames = [f"load{args.seed}-{i}" for i in range(args.users)]
+            user_ids = await asyncio.gather(*(register_user(client, username) for username in usernames))
+            await asyncio.to_thread(seed_history, user_ids, args.history, args.seed)
+            tokens = await asyncio.gather(*(login(client, username) for username in usernames))
+            users = [VirtualUser(username, token, f"{args.seed}:{i}")
+                     for i, (username, token) in enumerate(zip(usernames, tokens))]
+
+            results = []
+            for concurrency in args.concurrency:
+                for row in await run_level(client, users, concurrency, mix, args.seconds):
+                    print(json.dumps(row), flush=True)
+                    results.append(row)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": {
+                "python": platform.python_version(),
+                "database": engine.dialect.name,
+                "users": args.users,
+                "history": args.history,
+                "seconds": args.seconds,
+                "mix": mix,
+                "seed": args.seed,
+            }, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""Micro-benchmark suite for the analysis code paths.
+
+Times ExpenseCategorizer.categorize, the FinancialForecaster and AIAdvisor
+methods and get_spending_insights on synthetic histories (see synthetic.py)
+at several sizes, all in memory. With --db-users it also seeds a throwaway
+SQLite database with many users and times seeding, the rollup rebuild, the
+column loader, the rollup summary and the batch forecast.
+
+Every measurement is one JSON line (min/median/max milliseconds over
+--repeat runs). --output saves the run with its environment; --compare
+diffs the run against a saved one and exits 1 when any median got slower
+than --threshold.
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 --output bench.json
+    python benchmarks/bench_suite.py --compare bench.json
+    python benchmarks/bench_suite.py --sizes 1000 --db-users 1000 --db-per-user 1000
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List
+
+_db_dir = tempfile.mkdtemp(prefix="bench_suite_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import rollup_service  # noqa: E402
+from ai_service import advisor, as_profile, forecaster  # noqa: E402
+from forecast_service import run_batch_forecast  # noqa: E402
+from main import SessionLocal  # noqa: E402
+from nlp_service import categorization_cache, categorize_expenses, categorizer, get_spending_insights  # noqa: E402
+from synthetic import generate_transactions, seed_database  # noqa: E402
+from transaction_columns import as_columns, load_transaction_columns  # noqa: E402
+
+CHAT_MESSAGES = ["What should my budget be?", "How can I save more?", "Where should I invest?",
+                 "Show my spending", "hello"]
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_DELTA_MS = 0.01
+
+def measure(fn: Callable, repeat: int, min_time: float = 0.05) -> Dict:
+    """Time ``fn`` like timeit: loop it until one sample takes ``min_time``, keep ``repeat`` samples."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1000:
+            break
+        loops *= 10 if elapsed * 10 < min_time else 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        "loops": loops,
+        "min_ms": round(min(samples) * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "max_ms": round(max(samples) * 1000, 4),
+    }
+
+def memory_benchmarks(size: int, seed: int) -> Iterator[tuple]:
+    """(name, fn) pairs over one synthetic user with ``size`` transactions."""
+    transactions = generate_transactions(1, size, seed)
+    descriptions = [t["description"] for t in transactions]
+    profile = as_profile(transactions)
+    monthly = forecaster.prepare_data(transactions)
+    income = profile.total_income / max(len(monthly), 1)
+    summary = profile.summary()
+
+    def categorize_all():
+        for description in descriptions:
+            categorizer.categorize(description)
+
+    def categorize_uncached():
+        categorization_cache.clear()
+        categorize_expenses(descriptions)
+
+    def chat_all():
+        for message in CHAT_MESSAGES:
+            advisor.chat_response(message, summary)
+
+    yield "categorizer.categorize", categorize_all
+    yield "categorize_expenses.cold", categorize_uncached
+    yield "categorize_expenses.warm", lambda: categorize_expenses(descriptions)
+    yield "transaction_columns.as_columns", lambda: as_columns(transactions)
+    yield "as_profile", lambda: as_profile(transactions)
+    yield "forecaster.prepare_data", lambda: forecaster.prepare_data(transactions)
+    yield "forecaster.simple_forecast", lambda: forecaster.simple_forecast(monthly)
+    yield "forecaster.category_forecast", lambda: forecaster.category_forecast(transactions)
+    yield "advisor.analyze_spending_patterns", lambda: advisor.analyze_spending_patterns(transactions)
+    yield "advisor.analyze_spending_patterns.profile", lambda: advisor.analyze_spending_patterns(profile)
+    yield "advisor.generate_budget_recommendations", \
+        lambda: advisor.generate_budget_recommendations(transactions, income)
+    yield "advisor.generate_budget_recommendations.profile", \
+        lambda: advisor.generate_budget_recommendations(profile, income)
+    yield "advisor.chat_response", chat_all
+    yield "get_spending_insights", lambda: get_spending_insights(transactions)
+
+def database_benchmarks(users: int, per_user: int, seed: int, repeat: int) -> Iterator[Dict]:
+    """Seed ``users`` x ``per_user`` rows once, then time the database-backed paths."""
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        written = seed_database(db, users, per_user, seed)
+        seconds = time.perf_counter() - start
+        yield {"benchmark": "db.seed", "size": written, "users": users, "ms": round(seconds * 1000, 1),
+               "rows_per_second": round(written / seconds)}
+
+        sizes = {"size": written, "users": users}
+        one_user = {"size": per_user, "users": 1}
+        cases = [
+            ("db.rollup_rebuild.user", one_user, lambda: (rollup_service.rebuild(db, 1), db.commit())),
+            ("db.load_transaction_columns", one_user, lambda: load_transaction_columns(db, 1)),
+            ("db.rollup_summarize", one_user, lambda: rollup_service.summarize(db, 1)),
+            ("db.rollup_rebuild.all", sizes, lambda: (rollup_service.rebuild(db), db.commit())),
+            ("db.run_batch_forecast", sizes, lambda: run_batch_forecast(db)),
+        ]
+        for name, meta, fn in cases:
+            yield {"benchmark": name, **meta, **measure(fn, repeat)}
+    finally:
+        db.close()
+
+def environment(seed: int) -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "commit": commit,
+        "seed": seed,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def result_key(result: Dict) -> tuple:
+    return result["benchmark"], result["size"], result.get("users", 1)
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[Dict]:
+    """Print median ratios against a saved run; return the results slower by more than ``threshold``."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or "median_ms" not in result or not old.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / old["median_ms"]
+        regressed = ratio > 1 + threshold and result["median_ms"] - old["median_ms"] > MIN_DELTA_MS
+        print(json.dumps({"benchmark": result["benchmark"], "size": result["size"],
+                          "baseline_ms": old["median_ms"], "median_ms": result["median_ms"],
+                          "ratio": round(ratio, 3), "regression": regressed}))
+        if regressed:
+            regressions.append(result)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="transactions per in-memory history")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="run benchmarks whose name contains this")
+    parser.add_argument("--db-users", type=int, default=0, help="also seed this many users into SQLite")
+    parser.add_argument("--db-per-user", type=int, default=1000)
+    parser.add_argument("--output", help="write the run as JSON to this file")
+    parser.add_argument("--compare", help="a previous --output file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for name, fn in memory_benchmarks(size, args.seed):
+            if args.only and args.only not in name:
+                continue
+            result = {"benchmark": name, "size": size, **measure(fn, args.repeat)}
+            print(json.dumps(result), flush=True)
+            results.append(result)
+    if args.db_users:
+        for result in database_benchmarks(args.db_users, args.db_per_user, args.seed, args.repeat):
+            if args.only and args.only not in result["benchmark"]:
+                continue
+            print(json.dumps(result), flush=True)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": environment(args.seed), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
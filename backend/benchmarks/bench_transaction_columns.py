@@ -0,0 +1,112 @@
+"""Benchmark for loading a user's transactions into the AI analyses.
+
+Seeds a throwaway SQLite database with one user's history at several sizes and
+runs prepare_data, category_forecast and the AIAdvisor analyses three ways:
+from ORM objects turned into dicts (the old path), from load_transaction_columns,
+and from a single FinancialProfile built from those columns.
+Prints one JSON object per size with wall time and tracemalloc peak memory.
+
+    python benchmarks/bench_transaction_columns.py --sizes 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_columns_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import advisor, forecaster  # noqa: E402
+from main import SessionLocal, Transaction  # noqa: E402
+from profile_service import build_profile  # noqa: E402
+from transaction_columns import load_transaction_columns  # noqa: E402
+
+CATEGORIES = ["Food & Dining", "Transportation", "Shopping", "Bills & Utilities",
+              "Entertainment", "Healthcare", "Education", "Investment"]
+
+def seed(db, user_id: int, count: int):
+    rng = random.Random(user_id)
+    start = datetime(2020, 1, 1)
+    rows = []
+    for i in range(count):
+        is_income = rng.random() < 0.1
+        rows.append({
+            "user_id": user_id,
+            "description": "Salary Deposit" if is_income else "Card purchase",
+            "amount": rng.uniform(20000, 90000) if is_income else -rng.uniform(50, 5000),
+            "category": "Income" if is_income else rng.choice(CATEGORIES),
+            "transaction_type": "income" if is_income else "expense",
+            "date": start + timedelta(minutes=rng.randrange(60 * 24 * 365 * 5)),
+            "is_ai_categorized": False,
+        })
+    db.bulk_insert_mappings(Transaction, rows)
+    db.commit()
+
+def analyse(transactions):
+    forecaster.prepare_data(transactions)
+    forecaster.category_forecast(transactions)
+    advisor.analyze_spending_patterns(transactions)
+    advisor.generate_budget_recommendations(transactions, 100000)
+
+def from_dicts(db, user_id: int):
+    """The old path: ORM objects copied into one dict per transaction."""
+    transactions = [
+        {"date": t.date, "amount": t.amount, "category": t.category, "transaction_type": t.transaction_type}
+        for t in db.query(Transaction).filter(Transaction.user_id == user_id)
+    ]
+    analyse(transactions)
+    db.expunge_all()
+
+def from_columns(db, user_id: int):
+    analyse(load_transaction_columns(db, user_id))
+
+def from_profile(db, user_id: int):
+    analyse(build_profile(db, user_id))
+
+def measure(fn, repeat: int):
+    """Best wall time over ``repeat`` runs, then peak traced memory of one more run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for user_id, size in enumerate(args.sizes, start=1):
+        db = SessionLocal()
+        try:
+            seed(db, user_id, size)
+            dict_seconds, dict_peak = measure(lambda: from_dicts(db, user_id), args.repeat)
+            column_seconds, column_peak = measure(lambda: from_columns(db, user_id), args.repeat)
+            profile_seconds, profile_peak = measure(lambda: from_profile(db, user_id), args.repeat)
+        finally:
+            db.close()
+        print(json.dumps({
+            "benchmark": "transaction_columns",
+            "rows": size,
+            "dicts_ms": round(dict_seconds * 1000, 3),
+            "columns_ms": round(column_seconds * 1000, 3),
+            "profile_ms": round(profile_seconds * 1000, 3),
+            "dicts_peak_mb": round(dict_peak / 2 ** 20, 2),
+            "columns_peak_mb": round(column_peak / 2 ** 20, 2),
+            "profile_peak_mb": round(profile_peak / 2 ** 20, 2),
+        }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Deterministic synthetic financial data for benchmarks.
+
+Every user gets a reproducible profile from (seed, user_id): a salary that
+lands on a fixed day and rises each April, an optional March bonus, rent and
+other recurring bills, and card/UPI spending at Indian merchants whose
+category mix follows the calendar (festive shopping in October-November,
+travel in December, school fees in June). Rows are the dicts the import path
+and ``bulk_insert`` take, oldest first.
+
+    from synthetic import generate_transactions, seed_database
+    rows = generate_transactions(user_id=1, count=10000)
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+from models import Transaction, User  # noqa: E402
+import rollup_service  # noqa: E402
+
+# category -> [(merchant description, typical amount in rupees, lognormal sigma)]
+MERCHANTS = {
+    "Food & Dining": [
+        ("SWIGGY*ORDER", 450, 0.5), ("ZOMATO ONLINE ORDER", 520, 0.5), ("DOMINOS PIZZA", 650, 0.3),
+        ("BIG BAZAAR", 2200, 0.6), ("DMART SUPERMARKET", 1800, 0.6), ("CHAAYOS CAFE", 280, 0.3),
+        ("HALDIRAMS RESTAURANT", 900, 0.4), ("MOTHER DAIRY", 120, 0.3),
+    ],
+    "Transportation": [
+        ("UBER INDIA TRIP", 320, 0.5), ("OLA CABS", 290, 0.5), ("INDIAN OIL PETROL PUMP", 2500, 0.3),
+        ("HP FUEL STATION", 2200, 0.3), ("DELHI METRO RECHARGE", 500, 0.2), ("FASTAG TOLL", 180, 0.4),
+        ("IRCTC TRAIN TICKET", 1400, 0.6), ("AUTO RICKSHAW", 90, 0.4),
+    ],
+    "Shopping": [
+        ("AMAZON PAY INDIA PURCHASE", 1600, 0.8), ("FLIPKART INTERNET", 1900, 0.8), ("MYNTRA CLOTHES", 1500, 0.5),
+        ("RELIANCE DIGITAL ELECTRONICS", 9000, 0.9), ("TANISHQ JEWELRY", 25000, 0.7),
+        ("PHOENIX MALL STORE", 2800, 0.6), ("NYKAA COSMETICS", 1100, 0.5),
+    ],
+    "Bills & Utilities": [
+        ("BESCOM ELECTRICITY BILL", 1800, 0.3), ("AIRTEL BROADBAND", 999, 0.05), ("JIO MOBILE RECHARGE", 299, 0.1),
+        ("INDANE GAS CYLINDER", 1100, 0.05), ("WATER BILL", 400, 0.2), ("SOCIETY MAINTENANCE", 3500, 0.2),
+    ],
+    "Entertainment": [
+        ("NETFLIX SUBSCRIPTION", 649, 0.01), ("SPOTIFY INDIA", 119, 0.01), ("BOOKMYSHOW MOVIE", 750, 0.4),
+        ("PVR CINEMA", 900, 0.4), ("CULT GYM MEMBERSHIP", 1500, 0.2), ("MAKEMYTRIP HOTEL BOOKING", 8000, 0.7),
+    ],
+    "Healthcare": [
+        ("APOLLO PHARMACY", 650, 0.6), ("MEDPLUS MEDICINE", 480, 0.6), ("MAX HOSPITAL", 6000, 0.9),
+        ("PRACTO DOCTOR CONSULTATION", 700, 0.3), ("THYROCARE LAB TEST", 1200, 0.4),
+    ],
+    "Education": [
+        ("SCHOOL FEES", 15000, 0.4), ("UDEMY COURSE", 499, 0.3), ("COLLEGE TUITION", 30000, 0.5),
+        ("CROSSWORD BOOKS", 800, 0.4), ("STATIONERY STORE", 250, 0.4),
+    ],
+    "Investment": [
+        ("ZERODHA SIP", 5000, 0.3), ("GROWW MUTUAL FUND SIP", 3000, 0.3), ("PPF DEPOSIT", 10000, 0.3),
+    ],
+}
+CATEGORIES = list(MERCHANTS)
+# Share of spending transactions per category for an average month
+BASE_MIX = np.array([0.34, 0.2, 0.14, 0.1, 0.08, 0.06, 0.03, 0.05])
+# Month (1-12) -> category multipliers applied to BASE_MIX
+SEASONALITY = {
+    3: {"Investment": 2.0},  # tax-saving investments before the financial year ends
+    6: {"Education": 4.0},  # school and college fees
+    10: {"Shopping": 1.8, "Food & Dining": 1.2},  # Navratri / Diwali
+    11: {"Shopping": 1.6, "Entertainment": 1.3},
+    12: {"Entertainment": 1.8, "Transportation": 1.3},  # holiday travel
+}
+EMPLOYERS = ["INFOSYS LTD", "TATA CONSULTANCY", "HDFC BANK", "WIPRO LTD", "RELIANCE IND", "FLIPKART PVT LTD"]
+PAYMENT_PREFIXES = ["UPI/", "UPI/", "POS ", ""]  # how card and UPI spends show up on statements
+
+def _month_mix() -> np.ndarray:
+    """Cumulative category probabilities for each calendar month, shape (12, categories)."""
+    mix = np.tile(BASE_MIX, (12, 1))
+    for month, multipliers in SEASONALITY.items():
+        for category, factor in multipliers.items():
+            mix[month - 1, CATEGORIES.index(category)] *= factor
+    mix /= mix.sum(axis=1, keepdims=True)
+    return np.cumsum(mix, axis=1)
+
+MONTH_MIX = _month_mix()
+# MERCHANTS flattened so per-transaction lookups are array indexing
+_MERCHANT_ROWS = [(category, *merchant) for category in CATEGORIES for merchant in MERCHANTS[category]]
+_MERCHANT_COUNTS = np.array([len(MERCHANTS[category]) for category in CATEGORIES])
+_MERCHANT_OFFSETS = np.cumsum(_MERCHANT_COUNTS) - _MERCHANT_COUNTS
+_TYPICAL = np.array([row[2] for row in _MERCHANT_ROWS], dtype=float)
+_SIGMA = np.array([row[3] for row in _MERCHANT_ROWS])
+
+def _add_months(start: datetime, months: int) -> datetime:
+    month = start.month - 1 + months
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1, day=1)
+
+def generate_transactions(user_id: int, count: int, seed: int = 0, start: datetime = datetime(2022, 1, 1),
+                          months: Optional[int] = None) -> List[Dict]:
+    """About ``count`` transactions for one user, the same for the same (seed, user_id).
+
+    History spans ``months`` months (by default enough for roughly 40
+    transactions a month, between 6 and 60 months).
+    """
+    rng = np.random.default_rng([seed, user_id])
+    months = months or int(np.clip(count // 40, 6, 60))
+    salary = float(np.round(rng.lognormal(np.log(60000), 0.5), -2))
+    salary_day = int(rng.choice([1, 1, 1, 7, 28]))
+    employer = EMPLOYERS[int(rng.integers(len(EMPLOYERS)))]
+    rent = float(np.round(salary * rng.uniform(0.15, 0.3), -2)) if rng.random() < 0.6 else 0.0
+    spend_scale = salary / 60000 * rng.uniform(0.6, 1.1)
+
+    month_starts = [_add_months(start, i) for i in range(months)]
+    rows = []
+    raises = 0
+    for month_start in month_starts:
+        if month_start.month == 4 and month_start != month_starts[0]:
+            raises += 1
+        pay = salary * (1 + 0.07) ** raises
+        rows.append(("SALARY CREDIT " + employer, round(pay, 2), "Income", "income",
+                     month_start.replace(day=salary_day, hour=9)))
+        if month_start.month == 3 and rng.random() < 0.5:
+            rows.append(("ANNUAL BONUS " + employer, round(pay * rng.uniform(0.5, 2), 2), "Income", "income",
+                         month_start.replace(day=25, hour=9)))
+        if rent:
+            rows.append(("HOUSE RENT NEFT", -rent, "Bills & Utilities", "expense", month_start.replace(day=5, hour=10)))
+
+    # Card/UPI spending: pick month, then category by that month's mix, then merchant and amount
+    spending = max(count - len(rows), 0)
+    month_index = rng.integers(0, months, spending)
+    calendar_month = np.array([month_start.month - 1 for month_start in month_starts])[month_index]
+    category_index = (MONTH_MIX[calendar_month] < rng.random(spending)[:, None]).sum(axis=1)
+    category_index = np.minimum(category_index, len(CATEGORIES) - 1)
+    merchant = _MERCHANT_OFFSETS[category_index] + (rng.random(spending) * _MERCHANT_COUNTS[category_index]).astype(int)
+    amounts = np.round(_TYPICAL[merchant] * spend_scale * np.exp(_SIGMA[merchant] * rng.standard_normal(spending)), 2)
+    offsets = rng.integers(0, 28 * 24 * 60, spending)
+    prefixes = rng.integers(0, len(PAYMENT_PREFIXES), spending)
+    references = rng.integers(100000, 999999, spending)
+
+    for i in range(spending):
+        category, description, _, _ = _MERCHANT_ROWS[merchant[i]]
+        prefix = PAYMENT_PREFIXES[prefixes[i]]
+        if prefix == "UPI/":
+            description = f"UPI/{description}/{references[i]}"
+        elif prefix:
+            description = prefix + description
+        date = month_starts[month_index[i]] + timedelta(minutes=int(offsets[i]))
+        rows.append((description, -float(amounts[i]), category, "expense", date))
+
+    rows.sort(key=lambda row: row[4])
+    return [
+        {"user_id": user_id, "description": description, "amount": amount, "category": category,
+         "transaction_type": transaction_type, "date": date, "is_ai_categorized": False}
+        for description, amount, category, transaction_type, date in rows
+    ]
+
+def generate_users(users: int, per_user: int, seed: int = 0, first_user_id: int = 1, **kwargs) -> Iterator[List[Dict]]:
+    """One transaction list per user, for user ids first_user_id onwards."""
+    for user_id in range(first_user_id, first_user_id + users):
+        yield generate_transactions(user_id, per_user, seed, **kwargs)
+
+def seed_database(db, users: int, per_user: int, seed: int = 0, first_user_id: int = 1,
+                  batch_size: int = 50000) -> int:
+    """Insert users and their synthetic history, then rebuild the monthly rollups. Returns rows written."""
+    db.execute(insert(User), [
+        {"id": user_id, "email": f"user{user_id}@example.com", "username": f"user{user_id}",
+         "hashed_password": "!", "full_name": f"User {user_id}", "is_active": True, "data_version": 0}
+        for user_id in range(first_user_id, first_user_id + users)
+    ])
+    written = 0
+    batch: List[Dict] = []
+    for rows in generate_users(users, per_user, seed, first_user_id):
+        batch.extend(rows)
+        if len(batch) >= batch_size:
+            db.execute(insert(Transaction), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(Transaction), batch)
+        written += len(batch)
+    if users == 1:
+        rollup_service.rebuild(db, first_user_id)
+    else:
+        rollup_service.rebuild(db)
+    db.commit()
+    return written
@@ -0,0 +1,212 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from sqlalchemy import and_, extract, func, insert, tuple_, update
+from sqlalchemy.orm import Session
+from models import AIInsight, Budget, MonthlyRollup, Transaction
+
+BUDGET_SOURCE = "budget"
+# Percent-of-limit levels that raise an alert when spending crosses them upwards
+ALERT_THRESHOLDS = tuple(sorted(float(level) for level in os.getenv("BUDGET_ALERT_THRESHOLDS", "80,100").split(",")))
+
+BudgetKey = Tuple[int, int, int, str]  # user_id, year, month, category
+
+def _budget_key(transaction) -> Tuple[Optional[BudgetKey], float]:
+    if isinstance(transaction, Mapping):
+        fields = (transaction["user_id"], transaction["date"], transaction["category"],
+                  transaction["transaction_type"], transaction["amount"])
+    else:
+        fields = (transaction.user_id, transaction.date, transaction.category,
+                  transaction.transaction_type, transaction.amount)
+    user_id, date, category, transaction_type, amount = fields
+    if transaction_type != "expense" or date is None:
+        return None, 0.0
+    return (user_id, date.year, date.month, category), abs(amount)
+
+def percent_used(spent: float, limit: float) -> Optional[float]:
+    return spent / limit * 100 if limit > 0 else None
+
+def crossed_thresholds(old_percent: Optional[float], new_percent: Optional[float]) -> List[float]:
+    """Alert levels passed on the way up from old_percent to new_percent."""
+    if old_percent is None or new_percent is None:
+        return []
+    return [level for level in ALERT_THRESHOLDS if old_percent < level <= new_percent]
+
+def alert_row(user_id: int, category: str, year: int, month: int, level: float,
+              spent: float, limit: float, created_at: datetime) -> Dict:
+    if level >= 100:
+        title = f"Budget Exceeded: {category}"
+        message = (f"You've spent ₹{spent:,.0f} on {category} in {month:02d}/{year}, "
+                   f"over your ₹{limit:,.0f} budget.")
+    else:
+        title = f"Budget {level:.0f}% Used: {category}"
+        message = (f"You've used {spent / limit * 100:.0f}% of your ₹{limit:,.0f} {category} budget "
+                   f"for {month:02d}/{year} (₹{limit - spent:,.0f} left).")
+    return {
+        "user_id": user_id,
+        "source": BUDGET_SOURCE,
+        "insight_type": "alert",
+        "title": title,
+        "message": message,
+        "confidence_score": 100.0,
+        "is_read": False,
+        "created_at": created_at,
+    }
+
+def apply_transactions(db: Session, transactions: Iterable, sign: int = 1) -> int:
+    """Add (sign=1) or remove (sign=-1) expenses from the matching budgets' current_spent."""
+    return apply_changes(db, ((sign, transaction) for transaction in transactions))
+
+def apply_changes(db: Session, changes: Iterable[Tuple[int, object]]) -> int:
+    """Apply (sign, transaction) pairs to the matching budgets' current_spent.
+
+    Deltas are netted per (user, month, category) first, so an edit passed
+    as (-1, old) and (1, new) moves each budget once, and only budgets that
+    exist are touched: one indexed read (locking the rows on databases that
+    support it) and one increment per budget. Net increases that cross a
+    threshold become AIInsight alerts in the same database transaction.
+    Returns the number of alerts raised.
+    """
+    deltas: Dict[BudgetKey, float] = defaultdict(float)
+    for sign, transaction in changes:
+        key, amount = _budget_key(transaction)
+        if key is not None:
+            deltas[key] += sign * amount
+    if not deltas:
+        return 0
+
+    budgets = db.query(
+        Budget.id, Budget.user_id, Budget.year, Budget.month, Budget.category,
+        Budget.current_spent, Budget.monthly_limit,
+    ).filter(
+        tuple_(Budget.user_id, Budget.year, Budget.month, Budget.category).in_(list(deltas))
+    ).with_for_update().all()
+
+    alerts = []
+    created_at = datetime.utcnow()
+    for budget in budgets:
+        delta = deltas[(budget.user_id, budget.year, budget.month, budget.category)]
+        if delta == 0:
+            continue
+        db.execute(
+            update(Budget).where(Budget.id == budget.id).values(current_spent=Budget.current_spent + delta),
+            execution_options={"synchronize_session": False},
+        )
+        if delta < 0:  # only net increases can cross a threshold
+            continue
+        old_spent = budget.current_spent or 0.0
+        new_spent = old_spent + delta
+        limit = budget.monthly_limit
+        for level in crossed_thresholds(percent_used(old_spent, limit), percent_used(new_spent, limit)):
+            alerts.append(alert_row(budget.user_id, budget.category, budget.year, budget.month,
+                                    level, new_spent, limit, created_at))
+    if alerts:
+        db.execute(insert(AIInsight), alerts)
+    return len(alerts)
+
+def month_spent(db: Session, user_id: int, year: int, month: int, category: str) -> float:
+    """A category's expenses for one month, read from the monthly rollups."""
+    total = db.query(MonthlyRollup.total).filter(
+        MonthlyRollup.user_id == user_id, MonthlyRollup.year == year, MonthlyRollup.month == month,
+        MonthlyRollup.category == category, MonthlyRollup.transaction_type == "expense",
+    ).scalar()
+    return total or 0.0
+
+def create_budget(db: Session, user_id: int, category: str, monthly_limit: float, year: int, month: int) -> Budget:
+    """Add a budget whose counter starts from the month's rollup total, alerting for thresholds already passed."""
+    spent = month_spent(db, user_id, year, month, category)
+    budget = Budget(user_id=user_id, category=category, monthly_limit=monthly_limit,
+                    current_spent=spent, year=year, month=month)
+    db.add(budget)
+    created_at = datetime.utcnow()
+    for level in crossed_thresholds(0.0, percent_used(spent, monthly_limit)):
+        db.add(AIInsight(**alert_row(user_id, category, year, month, level, spent, monthly_limit, created_at)))
+    return budget
+
+def set_limit(db: Session, budget: Budget, monthly_limit: float) -> int:
+    """Change a budget's limit, alerting if the lower limit puts spending past a threshold."""
+    spent = budget.current_spent or 0.0
+    levels = crossed_thresholds(percent_used(spent, budget.monthly_limit), percent_used(spent, monthly_limit))
+    budget.monthly_limit = monthly_limit
+    created_at = datetime.utcnow()
+    for level in levels:
+        db.add(AIInsight(**alert_row(budget.user_id, budget.category, budget.year, budget.month,
+                                     level, spent, monthly_limit, created_at)))
+    return len(levels)
+
+def budget_status(budget: Budget) -> Dict:
+    spent = budget.current_spent or 0.0
+    return {
+        "id": budget.id,
+        "category": budget.category,
+        "monthly_limit": budget.monthly_limit,
+        "current_spent": spent,
+        "remaining": budget.monthly_limit - spent,
+        "percent_used": percent_used(spent, budget.monthly_limit),
+        "month": budget.month,
+        "year": budget.year,
+    }
+
+def reconcile(db: Session, user_id: Optional[int] = None, fix: bool = False,
+              tolerance: float = 0.005) -> List[Dict]:
+    """Compare every budget's current_spent with its month's raw transactions.
+
+    Returns the budgets that disagree by more than ``tolerance``; with
+    ``fix`` their counters are overwritten with the recomputed totals (the
+    caller commits). No alerts are raised for corrections.
+    """
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    actual = db.query(
+        Transaction.user_id.label("user_id"),
+        year.label("year"),
+        month.label("month"),
+        Transaction.category.label("category"),
+        func.sum(func.abs(Transaction.amount)).label("spent"),
+    ).filter(Transaction.transaction_type == "expense")
+    if user_id is not None:
+        actual = actual.filter(Transaction.user_id == user_id)
+    actual = actual.group_by(Transaction.user_id, year, month, Transaction.category).subquery()
+
+    query = db.query(Budget, func.coalesce(actual.c.spent, 0.0)).outerjoin(actual, and_(
+        actual.c.user_id == Budget.user_id,
+        actual.c.year == Budget.year,
+        actual.c.month == Budget.month,
+        actual.c.category == Budget.category,
+    ))
+    if user_id is not None:
+        query = query.filter(Budget.user_id == user_id)
+
+    mismatches = []
+    for budget, spent in query:
+        recorded = budget.current_spent or 0.0
+        if abs(recorded - spent) > tolerance:
+            mismatches.append({"budget_id": budget.id, "user_id": budget.user_id, "category": budget.category,
+                               "year": budget.year, "month": budget.month,
+                               "recorded": recorded, "actual": float(spent)})
+            if fix:
+                budget.current_spent = float(spent)
+    return mismatches
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Check budget current_spent counters against raw transactions.")
+    parser.add_argument("--user-id", type=int, help="only this user (default: everyone)")
+    parser.add_argument("--fix", action="store_true", help="overwrite wrong counters with the recomputed totals")
+    args = parser.parse_args()
+
+    Budget.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        mismatches = reconcile(db, args.user_id, args.fix)
+        if args.fix:
+            db.commit()
+    finally:
+        db.close()
+    for mismatch in mismatches:
+        print(json.dumps(mismatch))
+    print(f"{len(mismatches)} budgets out of sync" + (" (fixed)" if args.fix and mismatches else ""))
@@ -0,0 +1,143 @@
+import logging
+import os
+from datetime import datetime
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from time import monotonic
+from typing import Dict, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models import ChatHistory
+from cache import LRUCache
+from transaction_hooks import get_data_version
+import rollup_service
+
+logger = logging.getLogger(__name__)
+
+# (user_id, data_version) -> chat_response's user_data. Any worker's write
+# bumps the version, so a stale summary is never served; old ones age out.
+summary_cache = LRUCache(
+    maxsize=int(os.getenv("CHAT_SUMMARY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("CHAT_SUMMARY_TTL", "300")),
+)
+
+def get_chat_summary(db: Session, user_id: int) -> Dict:
+    """Totals, savings rate and category breakdown for the advisor, read from the rollups."""
+    key = (user_id, get_data_version(db, user_id))
+    summary = summary_cache.get(key)
+    if summary is None:
+        summary = rollup_service.summarize(db, user_id)
+        summary_cache.set(key, summary)
+    return summary
+
+_STOP = object()
+
+class ChatHistoryWriter:
+    """Write-behind queue that stores chat turns in batches.
+
+    ``record`` only enqueues; a background thread collects turns for up to
+    ``flush_interval`` seconds or ``batch_size`` turns and writes them with
+    one executemany insert and one commit. When the queue is full new turns
+    are dropped (and counted) rather than blocking the chat.
+    """
+
+    def __init__(self, session_factory=None,
+                 batch_size: int = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", "500")),
+                 flush_interval: float = float(os.getenv("CHAT_HISTORY_FLUSH_SECONDS", "1")),
+                 max_queue: int = int(os.getenv("CHAT_HISTORY_QUEUE_SIZE", "10000"))):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Queue = Queue(maxsize=max_queue)
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self, session_factory=None):
+        with self._lock:
+            if self._thread is not None:
+                return
+            if session_factory is not None:
+                self.session_factory = session_factory
+            self._thread = Thread(target=self._run, name="chat-history-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything queued so far, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def record(self, user_id: int, user_message: str, ai_response: str) -> bool:
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "user_message": user_message,
+                "ai_response": ai_response,
+                "created_at": datetime.utcnow(),
+            })
+        except Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if stopping:
+                # Drain anything still queued behind the stop marker
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not _STOP:
+                        batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        db = self.session_factory()
+        try:
+            db.execute(insert(ChatHistory), batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to store %d chat turns", len(batch))
+            with self._lock:
+                self.failed += len(batch)
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self.written += len(batch)
+            self.batches += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+chat_history_writer = ChatHistoryWriter()
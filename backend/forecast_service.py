@@ -0,0 +1,169 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+from models import Forecast, MonthlyRollup
+from ai_service import forecaster, optional_float
+from cache import LRUCache
+from metrics import stage
+from prophet_service import prophet_forecast
+from transaction_hooks import get_data_version
+import rollup_service
+
+USER_CHUNK_SIZE = 10000
+FORECAST_MODELS = ("simple", "prophet")
+
+# (user_id, data_version, horizon, model) -> forecast rows. A write bumps the
+# user's data version, so stale entries simply stop matching and age out.
+forecast_cache = LRUCache(
+    maxsize=int(os.getenv("FORECAST_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("FORECAST_CACHE_TTL", "86400")),
+)
+# Fallback answers (e.g. Prophet was busy) are only kept briefly so the
+# requested model gets another chance soon
+FALLBACK_CACHE_TTL = float(os.getenv("FORECAST_FALLBACK_TTL", "60"))
+
+def compute_forecast(db: Session, user_id: int, horizon: int, model: str, data_version: int = 0) -> Dict:
+    """Forecast one user from their monthly rollups.
+
+    Prophet runs in the worker pool; when it is unavailable, saturated or
+    too slow the trend model answers instead.
+    """
+    rows = rollup_service.monthly_rows(db, user_id)
+    with stage("analysis"):
+        data = forecaster.prepare_rollup_data(rows)
+    if model == "prophet":
+        forecast = prophet_forecast(user_id, data_version, data, horizon)
+        if forecast:
+            return {"model": "prophet", "forecast": forecast}
+    with stage("analysis"):
+        forecast = forecaster.simple_forecast(data, horizon)
+    if forecast:
+        return {"model": "simple", "forecast": forecast}
+    
+    # Fewer than two months of history: no trend to fit yet
+    total_expenses = rollup_service.summarize(db, user_id)["total_expenses"]
+    return {"model": "average", "forecast": forecaster.average_forecast(total_expenses, horizon)}
+
+def get_user_forecast(db: Session, user_id: int, horizon: int = 6, model: str = "simple") -> Dict:
+    """Serve a user's forecast from cache while their data version is unchanged."""
+    data_version = get_data_version(db, user_id)
+    key = (user_id, data_version, horizon, model)
+    result = forecast_cache.get(key)
+    if result is None:
+        result = {**compute_forecast(db, user_id, horizon, model, data_version), "data_version": data_version}
+        forecast_cache.set(key, result, ttl=FALLBACK_CACHE_TTL if model == "prophet" and result["model"] != model else None)
+    return result
+
+def load_monthly_series(db: Session, first_user_id: int, last_user_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Read monthly rollups for a user-id range into padded 2-D arrays.
+
+    Mirrors FinancialForecaster.prepare_data: each user's series is the months
+    that have expenses, oldest first, with that month's income alongside.
+    Returns (user_ids, expenses, income, lengths); rows are left-aligned and
+    padded with zeros past ``lengths``.
+    """
+    rows = db.query(
+        MonthlyRollup.user_id,
+        (MonthlyRollup.year * 12 + MonthlyRollup.month - 1).label("period"),
+        MonthlyRollup.transaction_type,
+        func.sum(MonthlyRollup.total).label("total"),
+    ).filter(
+        MonthlyRollup.user_id.between(first_user_id, last_user_id),
+        MonthlyRollup.count > 0,
+    ).group_by(
+        MonthlyRollup.user_id, "period", MonthlyRollup.transaction_type
+    ).all()
+
+    empty = np.empty((0, 0))
+    if not rows:
+        return np.empty(0, dtype=np.int64), empty, empty, np.empty(0, dtype=np.int64)
+
+    df = pd.DataFrame(rows, columns=["user_id", "period", "transaction_type", "total"])
+    totals = df.pivot_table(index=["user_id", "period"], columns="transaction_type",
+                            values="total", aggfunc="sum", fill_value=0.0)
+    if "expense" not in totals:
+        return np.empty(0, dtype=np.int64), empty, empty, np.empty(0, dtype=np.int64)
+    if "income" not in totals:
+        totals["income"] = 0.0
+    expense_months = df.loc[df["transaction_type"] == "expense", ["user_id", "period"]].drop_duplicates()
+    monthly = totals.loc[pd.MultiIndex.from_frame(expense_months)].sort_index()
+
+    user_codes, user_ids = pd.factorize(monthly.index.get_level_values("user_id"), sort=True)
+    positions = monthly.groupby(level="user_id").cumcount().to_numpy()
+    lengths = np.bincount(user_codes, minlength=len(user_ids))
+
+    shape = (len(user_ids), int(lengths.max()))
+    expenses = np.zeros(shape)
+    income = np.zeros(shape)
+    expenses[user_codes, positions] = monthly["expense"].to_numpy()
+    income[user_codes, positions] = monthly["income"].to_numpy()
+    return np.asarray(user_ids, dtype=np.int64), expenses, income, lengths
+
+def write_forecasts(db: Session, user_ids: np.ndarray, result: Dict[str, np.ndarray], created_at: datetime):
+    """Replace the stored forecasts for these users with one executemany insert."""
+    periods = result["confidence"].shape[0]
+    columns = [key for key in result if key != "confidence"]
+    user_column = np.repeat(user_ids, periods)
+    period_column = np.tile(np.arange(1, periods + 1), len(user_ids))
+    flat = {key: result[key].reshape(-1) for key in columns}
+    confidence = np.tile(result["confidence"], len(user_ids))
+
+    rows = [
+        {"user_id": int(user_column[i]), "period": int(period_column[i]), "confidence": float(confidence[i]),
+         "created_at": created_at, **{key: optional_float(flat[key][i]) for key in columns}}
+        for i in range(len(user_column))
+    ]
+    db.execute(delete(Forecast).where(Forecast.user_id.in_([int(user_id) for user_id in user_ids])))
+    if rows:
+        db.execute(insert(Forecast), rows)
+
+def run_batch_forecast(db: Session, periods: int = 6, chunk_size: int = USER_CHUNK_SIZE,
+                       user_ids: Optional[List[int]] = None) -> int:
+    """Forecast every user with at least two months of expenses.
+
+    Works through user-id ranges of ``chunk_size`` users: one rollup query,
+    one vectorized kernel call and one bulk write per chunk, committed as it
+    goes. Returns the number of users forecast.
+    """
+    query = db.query(MonthlyRollup.user_id).distinct().order_by(MonthlyRollup.user_id)
+    if user_ids is not None:
+        query = query.filter(MonthlyRollup.user_id.in_(user_ids))
+    all_user_ids = [user_id for (user_id,) in query]
+
+    created_at = datetime.utcnow()
+    forecast_count = 0
+    for start in range(0, len(all_user_ids), chunk_size):
+        chunk = all_user_ids[start:start + chunk_size]
+        ids, expenses, income, lengths = load_monthly_series(db, chunk[0], chunk[-1])
+        if user_ids is not None:
+            keep = np.isin(ids, chunk)
+            ids, expenses, income, lengths = ids[keep], expenses[keep], income[keep], lengths[keep]
+
+        # Same rule as simple_forecast: a trend needs at least two months
+        ready = lengths >= 2
+        result = forecaster.batch_forecast(expenses[ready], income[ready], lengths[ready], periods)
+        write_forecasts(db, ids[ready], result, created_at)
+        db.commit()
+        forecast_count += int(ready.sum())
+    return forecast_count
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Forecast every user's monthly expenses and income in bulk.")
+    parser.add_argument("--periods", type=int, default=6, help="months ahead to forecast")
+    parser.add_argument("--chunk-size", type=int, default=USER_CHUNK_SIZE, help="users per batch")
+    args = parser.parse_args()
+
+    Forecast.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        count = run_batch_forecast(db, args.periods, args.chunk_size)
+    finally:
+        db.close()
+    print(f"Forecast {count} users")
@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Dict, Optional
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from models import Goal
+from ai_service import forecaster
+from cache import LRUCache
+from metrics import stage
+from transaction_hooks import get_data_version
+import rollup_service
+
+SIMULATION_PATHS = int(os.getenv("GOAL_SIMULATION_PATHS", "20000"))
+SIMULATION_SEED = int(os.getenv("GOAL_SIMULATION_SEED", "0"))
+MAX_MONTHS = int(os.getenv("GOAL_MAX_MONTHS", "600"))
+# Months simulated per block; bounds memory at paths x block floats
+BLOCK_MONTHS = 60
+PERCENTILES = (10, 25, 50, 75, 90)
+# Monthly bands are read from this many paths (paths are i.i.d., so the first
+# ones are a fair sample); the probability and final balances use every path
+BAND_PATHS = 2000
+
+# (user_id, data_version, goal_id, goal fields, start month, paths) -> projection.
+# Seeded, so a cached answer is exactly what a recompute would return. Entries
+# for an older data version stop matching and age out.
+projection_cache = LRUCache(
+    maxsize=int(os.getenv("GOAL_PROJECTION_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("GOAL_PROJECTION_CACHE_TTL", "86400")),
+)
+
+def months_until(start: pd.Period, target_date: datetime) -> int:
+    """Whole months of saving from ``start`` up to and including the target's month."""
+    target = pd.Period(target_date, freq="M")
+    return max((target - start).n, 0)
+
+def simulate_savings(monthly_savings: np.ndarray, start_balance: float, target: float, months: int,
+                     paths: int, rng: np.random.Generator) -> Dict:
+    """Bootstrap ``paths`` savings trajectories from historical monthly savings.
+
+    Every simulated month draws one historical month (income and expenses
+    together), so the paths keep the user's real spread and seasonality
+    mix. All paths advance together as arrays, ``BLOCK_MONTHS`` at a time.
+    """
+    balances = np.full(paths, start_balance)
+    reached = balances >= target
+    first_hit = np.where(reached, 0, -1)
+    bands = []
+    for block_start in range(0, months, BLOCK_MONTHS):
+        block = min(BLOCK_MONTHS, months - block_start)
+        draws = monthly_savings[rng.integers(0, len(monthly_savings), size=(paths, block))]
+        path = np.cumsum(draws, axis=1)
+        path += balances[:, None]
+        hits = path >= target
+        new_hits = ~reached & hits.any(axis=1)
+        first_hit[new_hits] = block_start + 1 + hits[new_hits].argmax(axis=1)
+        reached |= new_hits
+        balances = path[:, -1].copy()
+        bands.append(np.percentile(path[:BAND_PATHS], PERCENTILES, axis=0))
+
+    hit_months = first_hit[reached]
+    return {
+        "probability": float(reached.mean()),
+        "median_months_to_target": float(np.median(hit_months)) if hit_months.size else None,
+        "final_balance": dict(zip((f"p{p}" for p in PERCENTILES),
+                                  np.percentile(balances, PERCENTILES).round(2).tolist())),
+        "bands": np.concatenate(bands, axis=1) if bands else np.empty((len(PERCENTILES), 0)),
+    }
+
+def project_goal(db: Session, goal: Goal, paths: int = SIMULATION_PATHS, data_version: int = 0) -> Dict:
+    """Probability of reaching a goal by its target date, with monthly balance bands."""
+    rows = rollup_service.monthly_rows(db, goal.user_id)
+    with stage("analysis"):
+        history = forecaster.prepare_rollup_data(rows)
+        savings = history["savings"].to_numpy(dtype=float) if not history.empty else np.zeros(1)
+        start = pd.Period(datetime.utcnow(), freq="M")
+        months = min(months_until(start, goal.target_date), MAX_MONTHS)
+
+        rng = np.random.default_rng([SIMULATION_SEED, goal.user_id, goal.id])
+        result = simulate_savings(savings, goal.current_amount or 0.0, goal.target_amount, months, paths, rng)
+    bands = result.pop("bands").round(2).tolist()
+    return {
+        "goal_id": goal.id,
+        "target_amount": goal.target_amount,
+        "current_amount": goal.current_amount or 0.0,
+        "target_date": goal.target_date,
+        "months": months,
+        "paths": paths,
+        "history_months": 0 if history.empty else len(history),
+        **result,
+        "bands": [
+            {"period": str(start + i + 1), **{f"p{p}": bands[j][i] for j, p in enumerate(PERCENTILES)}}
+            for i in range(months)
+        ],
+        "data_version": data_version,
+    }
+
+def get_goal_projection(db: Session, goal: Goal, paths: Optional[int] = None) -> Dict:
+    """Serve a goal's projection from cache while the user's data and the goal are unchanged."""
+    paths = paths or SIMULATION_PATHS
+    data_version = get_data_version(db, goal.user_id)
+    key = (goal.user_id, data_version, goal.id, goal.target_amount, goal.current_amount, goal.target_date,
+           str(pd.Period(datetime.utcnow(), freq="M")), paths)
+    result = projection_cache.get(key)
+    if result is None:
+        result = project_goal(db, goal, paths, data_version)
+        projection_cache.set(key, result)
+    return result
@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+import math
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from models import Transaction
+from nlp_service import categorize_expenses
+from transaction_hooks import record_changes
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M")
+
+def detect_format(filename: Optional[str]) -> str:
+    """Guess the statement format from the upload's file name."""
+    if filename and filename.lower().endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+def _parse_date(value) -> datetime:
+    if not value:
+        return datetime.utcnow()
+    value = str(value).strip()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value!r}")
+
+def _parse_amount(value) -> float:
+    if isinstance(value, (int, float)):
+        amount = float(value)
+    elif value is None or not str(value).strip():
+        raise ValueError("Missing amount")
+    else:
+        # Statements often use grouping commas, e.g. "1,23,456.00"
+        amount = float(str(value).replace(",", "").replace("₹", "").strip())
+    # NaN or infinity would poison the rollups, budgets and anomaly baselines for good
+    if not math.isfinite(amount):
+        raise ValueError(f"Amount must be a finite number, got {value!r}")
+    return amount
+
+def _text(value) -> str:
+    # JSON-lines rows can carry numbers, lists or objects where text belongs
+    return "" if value is None else str(value).strip()
+
+def validate_row(raw: Dict, user_id: int) -> Dict:
+    """Turn one parsed statement row into Transaction column values.
+
+    Raises ValueError with a readable message for bad rows; non-text values
+    are coerced with str() first. The category is
+    left as None when absent so the chunk can be categorized in one batch.
+    """
+    description = _text(raw.get("description"))
+    if not description:
+        raise ValueError("Missing description")
+
+    amount = _parse_amount(raw.get("amount"))
+    transaction_type = _text(raw.get("transaction_type") or raw.get("type")).lower()
+    if not transaction_type:
+        transaction_type = "expense" if amount < 0 else "income"
+    elif transaction_type not in ("income", "expense"):
+        raise ValueError(f"transaction_type must be income or expense, got {transaction_type!r}")
+
+    return {
+        "user_id": user_id,
+        "description": description,
+        "amount": amount,
+        "category": _text(raw.get("category")) or None,
+        "transaction_type": transaction_type,
+        "date": _parse_date(raw.get("date")),
+        "notes": _text(raw.get("notes")) or None,
+        "is_ai_categorized": False,
+    }
+
+def parse_rows(file: BinaryIO, statement_format: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Yield (line number, raw row, parse error) without reading the whole file.
+
+    The file must be UTF-8; anything else raises UnicodeDecodeError partway
+    through, when the first undecodable block is read.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if statement_format == "csv":
+        reader = csv.DictReader(text)
+        for raw in reader:
+            yield reader.line_num, {key.strip().lower(): value for key, value in raw.items() if key}, None
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as exc:
+                yield line_number, None, f"Invalid JSON: {exc}"
+                continue
+            if not isinstance(raw, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, raw, None
+
+def _chunks(iterator: Iterator, size: int) -> Iterator[List]:
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def import_transactions(db: Session, user_id: int, file: BinaryIO, statement_format: str,
+                        chunk_size: int = CHUNK_SIZE) -> Dict:
+    """Parse, categorize and insert a bank statement chunk by chunk.
+
+    Each chunk is categorized with one batch call, inserted with a single
+    executemany and committed together with its rollup deltas, so a failing
+    chunk never leaves partial rows behind. ``committed_chunks`` lists the
+    first and last line of every committed chunk. A file that is not UTF-8
+    stops the import at the chunk it fails in; the result then carries an
+    ``error`` and still reports the chunks committed before it.
+    """
+    imported = 0
+    failed = 0
+    errors = []
+    committed_chunks = []
+
+    def report(line_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": line_number, "error": message})
+
+    chunks = _chunks(parse_rows(file, statement_format), chunk_size)
+    while True:
+        try:
+            chunk = next(chunks, None)
+        except UnicodeDecodeError:
+            return {"imported": imported, "failed": failed, "errors": errors,
+                    "committed_chunks": committed_chunks,
+                    "error": "File is not valid UTF-8; save the statement as UTF-8 and import the remaining rows"}
+        if chunk is None:
+            break
+        rows = []
+        line_numbers = []
+        for line_number, raw, error in chunk:
+            if error is None:
+                try:
+                    rows.append(validate_row(raw, user_id))
+                    line_numbers.append(line_number)
+                    continue
+                except (TypeError, AttributeError, ValueError) as exc:
+                    error = str(exc)
+            report(line_number, error)
+        if not rows:
+            continue
+
+        uncategorized = [row for row in rows if row["category"] is None]
+        if uncategorized:
+            results = categorize_expenses([row["description"] for row in uncategorized])
+            for row, result in zip(uncategorized, results):
+                row["category"] = result["category"]
+                row["is_ai_categorized"] = True
+
+        try:
+            db.execute(insert(Transaction), rows)
+            record_changes(db, rows)
+            db.commit()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            for line_number in line_numbers:
+                report(line_number, f"Database error: {exc.__class__.__name__}")
+            continue
+        imported += len(rows)
+        committed_chunks.append([chunk[0][0], chunk[-1][0]])
+
+    return {"imported": imported, "failed": failed, "errors": errors, "committed_chunks": committed_chunks}
@@ -0,0 +1,191 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Condition, Thread
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from models import AIInsight
+from ai_service import FinancialProfile, advisor
+from nlp_service import spending_insights_from_totals
+from profile_service import get_financial_profile
+from transaction_hooks import on_commit
+
+logger = logging.getLogger(__name__)
+
+SPENDING_SOURCE = "spending"
+INSIGHT_WORKERS = int(os.getenv("INSIGHT_WORKERS", "2"))
+# Wait for writes to settle before recomputing, but never longer than the max delay
+INSIGHT_DEBOUNCE_SECONDS = float(os.getenv("INSIGHT_DEBOUNCE_SECONDS", "2"))
+INSIGHT_MAX_DELAY_SECONDS = float(os.getenv("INSIGHT_MAX_DELAY_SECONDS", "30"))
+
+def generate_insights(profile: FinancialProfile) -> List[Dict]:
+    """Spending insights from the advisor and the NLP heuristics for one profile."""
+    if profile.transaction_count == 0:
+        return []
+    insights = advisor.analyze_spending_patterns(profile)
+    insights += spending_insights_from_totals(profile.category_breakdown)["insights"]
+    return insights
+
+def refresh_user_insights(db: Session, user_id: int) -> int:
+    """Replace a user's spending insights with freshly generated ones.
+
+    Insights whose text is unchanged keep their read flag. Returns the
+    number of insights stored.
+    """
+    insights = generate_insights(get_financial_profile(db, user_id))
+    read = set(
+        db.query(AIInsight.insight_type, AIInsight.title, AIInsight.message).filter(
+            AIInsight.user_id == user_id, AIInsight.source == SPENDING_SOURCE, AIInsight.is_read.is_(True)
+        )
+    )
+    db.execute(delete(AIInsight).where(AIInsight.user_id == user_id, AIInsight.source == SPENDING_SOURCE))
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "source": SPENDING_SOURCE,
+            "insight_type": insight["type"],
+            "title": insight["title"],
+            "message": insight["message"],
+            "confidence_score": insight.get("confidence"),
+            "is_read": (insight["type"], insight["title"], insight["message"]) in read,
+            "created_at": created_at,
+        }
+        for insight in insights
+    ]
+    if rows:
+        db.execute(insert(AIInsight), rows)
+    db.commit()
+    return len(rows)
+
+class InsightWorker:
+    """Recomputes insights for users whose transactions changed, off the request path.
+
+    Writes mark users dirty; a user is processed once no write has arrived
+    for ``debounce`` seconds (or ``max_delay`` after the first under a steady
+    stream), so a burst of edits or a statement import costs one recompute.
+    At most ``workers`` users are processed at once and never the same user
+    twice concurrently.
+    """
+
+    def __init__(self, session_factory=None, workers: int = INSIGHT_WORKERS,
+                 debounce: float = INSIGHT_DEBOUNCE_SECONDS, max_delay: float = INSIGHT_MAX_DELAY_SECONDS):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._dirty: Dict[int, Tuple[float, float]] = {}  # user_id -> (first marked, due)
+        self._active: Set[int] = set()
+        self._condition = Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[Thread] = None
+        self._stopping = False
+        self.processed = 0
+        self.failures = 0
+
+    def start(self, session_factory=None):
+        with self._condition:
+            if self._thread is not None:
+                return
+            if session_factory is not None:
+                self.session_factory = session_factory
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="insights")
+            self._thread = Thread(target=self._dispatch, name="insight-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop dispatching; users still waiting are dropped."""
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._dirty.clear()
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def mark_dirty(self, user_ids: Iterable[int]):
+        """Schedule a recompute; a no-op unless the worker is running."""
+        now = monotonic()
+        with self._condition:
+            if self._thread is None:
+                return
+            for user_id in user_ids:
+                first_marked = self._dirty[user_id][0] if user_id in self._dirty else now
+                self._dirty[user_id] = (first_marked, min(now + self.debounce, first_marked + self.max_delay))
+            self._condition.notify()
+
+    def _dispatch(self):
+        with self._condition:
+            while not self._stopping:
+                now = monotonic()
+                free = self.workers - len(self._active)
+                waiting = [(due, user_id) for user_id, (_, due) in self._dirty.items() if user_id not in self._active]
+                ready = sorted(entry for entry in waiting if entry[0] <= now)[:max(free, 0)]
+                for _, user_id in ready:
+                    del self._dirty[user_id]
+                    self._active.add(user_id)
+                    self._executor.submit(self._process, user_id)
+
+                # Sleep until the next user is due, or until a slot frees up
+                later = [due for due, _ in waiting if due > now]
+                timeout = min(later) - now if later and free > len(ready) else None
+                self._condition.wait(timeout)
+
+    def _process(self, user_id: int):
+        try:
+            db = self.session_factory()
+            try:
+                refresh_user_insights(db, user_id)
+            finally:
+                db.close()
+        except Exception:
+            logger.exception("Insight refresh failed for user %s", user_id)
+            with self._condition:
+                self.failures += 1
+        finally:
+            with self._condition:
+                self._active.discard(user_id)
+                self.processed += 1
+                self._condition.notify()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                "running": self._thread is not None,
+                "workers": self.workers,
+                "dirty": len(self._dirty),
+                "active": len(self._active),
+                "processed": self.processed,
+                "failures": self.failures,
+            }
+
+insight_worker = InsightWorker()
+
+@on_commit
+def _queue_insight_refresh(user_ids: Set[int]):
+    insight_worker.mark_dirty(user_ids)
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, engine
+    from models import User
+
+    parser = argparse.ArgumentParser(description="Regenerate stored spending insights.")
+    parser.add_argument("--user-id", type=int, help="only this user (default: everyone)")
+    args = parser.parse_args()
+
+    AIInsight.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        user_ids = [args.user_id] if args.user_id else [user_id for (user_id,) in db.query(User.id)]
+        stored = sum(refresh_user_insights(db, user_id) for user_id in user_ids)
+    finally:
+        db.close()
+    print(f"Stored {stored} insights for {len(user_ids)} users")
@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from threading import Lock, get_ident
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; roughly Prometheus' default latency buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram of observed values."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts keyed by upper bound, plus count and sum."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"buckets": cumulative, "count": count, "sum": total}
+
+# Rows per request; powers of ten up to a million
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+class RequestTimings:
+    """Stage times, rows loaded and worker threads for the request in progress."""
+    __slots__ = ("stages", "rows", "threads", "endpoint_done")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.rows = 0
+        self.threads = set()
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+# Set by the request middleware; contextvars follow requests into the threadpool
+current_request: ContextVar[Optional[RequestTimings]] = ContextVar("current_request", default=None)
+
+class _Stage:
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name: str, timings: RequestTimings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.timings.threads.add(get_ident())
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, perf_counter() - self.start)
+        return False
+
+_NO_STAGE = nullcontext()
+
+def stage(name: str):
+    """Time a block as ``name`` within the current request; a no-op outside requests.
+
+    Stages may nest (database time is also inside "auth" or "endpoint"), and
+    repeated stages within one request add up.
+    """
+    timings = current_request.get()
+    return _NO_STAGE if timings is None else _Stage(name, timings)
+
+def record_rows(count: int):
+    """Add ``count`` rows to what the current request has loaded from the database."""
+    timings = current_request.get()
+    if timings is not None:
+        timings.rows += count
+
+class RequestMetrics:
+    """Per-route request counts and latency, stage and row histograms."""
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.stages: Dict[Tuple[str, str], Histogram] = {}
+        self.rows: Dict[str, Histogram] = {}
+        self._lock = Lock()
+
+    def _histogram(self, family: Dict, key, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        histogram = family.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = family.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def observe(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings):
+        with self._lock:
+            key = (method, route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+        self._histogram(self.latency, (method, route)).observe(seconds)
+        for name, stage_seconds in timings.stages.items():
+            self._histogram(self.stages, (route, name)).observe(stage_seconds)
+        self._histogram(self.rows, route, ROW_BUCKETS).observe(timings.rows)
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels.items()) + "}"
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class PrometheusText:
+    """Builds the Prometheus text exposition format (version 0.0.4), one family at a time."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def _family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def metric(self, name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict, float]]):
+        """A counter or gauge family from (labels, value) pairs; None values are skipped."""
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self._family(name, kind, help_text)
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, samples: Iterable[Tuple[Dict, Dict]]):
+        """A histogram family from (labels, Histogram.snapshot()) pairs."""
+        samples = list(samples)
+        if not samples:
+            return
+        self._family(name, "histogram", help_text)
+        for labels, snapshot in samples:
+            for bound, count in snapshot["buckets"].items():
+                self.lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_number(snapshot['sum'])}")
+            self.lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -16,6 +16,7 @@ class User(Base):
     phone_number = Column(String)
     date_of_birth = Column(DateTime)
     is_active = Column(Boolean, default=True)
+    data_version = Column(Integer, nullable=False, default=0)  # bumped on every transaction write
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -26,6 +27,10 @@ class User(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves per-user listing in (date, id) keyset order
+        Index("ix_transactions_user_date_id", "user_id", "date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -44,12 +49,16 @@ class Transaction(Base):
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        # One budget per category and month; budget_service looks budgets up by this key on every write
+        Index("ux_budgets_user_month_category", "user_id", "year", "month", "category", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category = Column(String, nullable=False)
     monthly_limit = Column(Float, nullable=False)
-    current_spent = Column(Float, default=0.0)
+    current_spent = Column(Float, default=0.0)  # maintained by budget_service on transaction writes
     month = Column(Integer, nullable=False)  # 1-12
     year = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -77,9 +86,14 @@ class Goal(Base):
 
 class AIInsight(Base):
     __tablename__ = "ai_insights"
+    __table_args__ = (
+        # Serves GET /ai/insights (newest first per user)
+        Index("ix_ai_insights_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    source = Column(String)  # producer, e.g. "spending"; a recompute only replaces its own rows
     insight_type = Column(String, nullable=False)  # forecast, recommendation, alert
     title = Column(String, nullable=False)
     message = Column(Text, nullable=False)
@@ -94,4 +108,46 @@ class ChatHistory(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user_message = Column(Text, nullable=False)
     ai_response = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+    
+    # One row per (user, month, category, type); maintained by rollup_service
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)  # 1-12
+    category = Column(String, primary_key=True)
+    transaction_type = Column(String, primary_key=True)  # income or expense
+    total = Column(Float, nullable=False, default=0.0)  # expense amounts are summed as absolute values
+    count = Column(Integer, nullable=False, default=0)
+    sum_of_squares = Column(Float, nullable=False, default=0.0)
+
+class CategoryBaseline(Base):
+    __tablename__ = "category_baselines"
+    
+    # Running expense statistics per (user, category); maintained by anomaly_service
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)  # Welford running mean of absolute amounts
+    m2 = Column(Float, nullable=False, default=0.0)  # Welford sum of squared deviations
+    median = Column(Float, nullable=False, default=0.0)  # exponentially decayed median of log1p(amount)
+    mad = Column(Float, nullable=False, default=0.0)  # its exponentially decayed median absolute deviation
+
+class Forecast(Base):
+    __tablename__ = "forecasts"
+    
+    # Latest batch forecast per user; one row per month ahead
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    period = Column(Integer, nullable=False)  # months ahead, starting at 1
+    predicted_expenses = Column(Float, nullable=False)
+    predicted_income = Column(Float, nullable=False)
+    predicted_savings = Column(Float, nullable=False)
+    expenses_lower = Column(Float)
+    expenses_upper = Column(Float)
+    income_lower = Column(Float)
+    income_upper = Column(Float)
+    confidence = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
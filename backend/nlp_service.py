@@ -1,5 +1,9 @@
+import os
 import re
-from typing import Dict, List
+from typing import Dict, List, NamedTuple
+from cache import LRUCache
+
+_SPECIAL_CHARS = re.compile(r'[^\w\s]')
 
 class ExpenseCategorizer:
     """Simple NLP-based expense categorization service."""
@@ -48,63 +52,152 @@ class ExpenseCategorizer:
                 "fixed", "deposit", "savings", "ppf", "nsc"
             ]
         }
+        self._compile_keywords()
     
-    def categorize(self, description: str) -> str:
-        """Categorize transaction based on description."""
-        description_lower = description.lower()
+    def _compile_keywords(self):
+        """Compile the keyword table into a single trie-shaped regex.
         
-        # Remove special characters and extra spaces
-        description_clean = re.sub(r'[^\w\s]', ' ', description_lower)
-        description_clean = ' '.join(description_clean.split())
+        The pattern is wrapped in a lookahead so that ``finditer`` reports every
+        position where a keyword starts, including overlapping and nested
+        occurrences. At each position the trie yields the longest keyword; the
+        shorter keywords that are its prefixes match at the same position too.
+        """
+        # Ties go to the category listed first, as with max() over the table
+        self._category_rank = {category: rank for rank, category in enumerate(self.category_keywords)}
         
-        # Score each category
-        category_scores = {}
+        self._keyword_categories = {}
         for category, keywords in self.category_keywords.items():
-            score = 0
             for keyword in keywords:
-                if keyword in description_clean:
-                    # Exact match gets higher score
-                    if keyword == description_clean:
-                        score += 10
-                    # Word boundary match
-                    elif re.search(r'\b' + keyword + r'\b', description_clean):
-                        score += 5
-                    # Partial match
-                    else:
-                        score += 1
-            category_scores[category] = score
+                self._keyword_categories.setdefault(keyword, []).append(category)
+        
+        all_keywords = list(self._keyword_categories)
+        self._keyword_prefixes = {
+            keyword: [other for other in all_keywords if keyword.startswith(other)]
+            for keyword in all_keywords
+        }
+        
+        trie = {}
+        for keyword in all_keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+        
+        self._keyword_pattern = re.compile("(?=(" + _trie_regex(trie) + "))")
+    
+    def _clean(self, description: str) -> str:
+        """Lowercase and strip special characters and extra spaces."""
+        description_clean = _SPECIAL_CHARS.sub(' ', description.lower())
+        return ' '.join(description_clean.split())
+    
+    def match(self, description: str) -> "CategoryMatch":
+        """Score every category against the description in a single pass.
+        
+        Each keyword found in the cleaned description contributes once to each
+        category it belongs to: 10 for an exact match of the whole description,
+        5 if any occurrence sits on word boundaries, 1 for a partial match.
+        """
+        return self._match_clean(self._clean(description))
+    
+    def _match_clean(self, description_clean: str) -> "CategoryMatch":
+        """Score an already cleaned description (see ``match``)."""
+        length = len(description_clean)
+        
+        # Best score seen per keyword across all of its occurrences
+        keyword_scores = {}
+        for found in self._keyword_pattern.finditer(description_clean):
+            start = found.start()
+            starts_word = start == 0 or description_clean[start - 1] == ' '
+            for keyword in self._keyword_prefixes[found.group(1)]:
+                end = start + len(keyword)
+                if starts_word and (end == length or description_clean[end] == ' '):
+                    score = 10 if start == 0 and end == length else 5
+                else:
+                    score = 1
+                if score > keyword_scores.get(keyword, 0):
+                    keyword_scores[keyword] = score
+        
+        scores = {}
+        matches = {}
+        for keyword, score in keyword_scores.items():
+            for category in self._keyword_categories[keyword]:
+                scores[category] = scores.get(category, 0) + score
+                matches[category] = matches.get(category, 0) + 1
+        
+        return CategoryMatch(scores, matches)
+    
+    def categorize(self, description: str, match: "CategoryMatch" = None) -> str:
+        """Categorize transaction based on description."""
+        category_scores = (match or self.match(description)).scores
         
         # Return category with highest score
         if category_scores:
-            best_category = max(category_scores, key=category_scores.get)
-            if category_scores[best_category] > 0:
-                return best_category
+            return max(category_scores, key=lambda category: (category_scores[category], -self._category_rank[category]))
         
         return "Other"
     
-    def get_confidence_score(self, description: str, predicted_category: str) -> float:
+    def get_confidence_score(self, description: str, predicted_category: str,
+                             match: "CategoryMatch" = None) -> float:
         """Get confidence score for the prediction."""
-        description_lower = description.lower()
         keywords = self.category_keywords.get(predicted_category, [])
+        if not keywords:
+            return 50
         
-        matches = sum(1 for keyword in keywords if keyword in description_lower)
-        confidence = min(matches / len(keywords) * 100, 95) if keywords else 50
+        matches = (match or self.match(description)).matches.get(predicted_category, 0)
+        confidence = min(matches / len(keywords) * 100, 95)
         
         return confidence
 
-# Singleton instance
+class CategoryMatch(NamedTuple):
+    """Keyword scores and hit counts for the categories that matched."""
+    scores: Dict[str, int]
+    matches: Dict[str, int]
+
+def _trie_regex(node: Dict) -> str:
+    """Render a character trie as a regex that prefers the longest keyword."""
+    branches = [re.escape(char) + _trie_regex(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # Greedy optional group: try the longer keywords before stopping here
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+# Singleton instances
 categorizer = ExpenseCategorizer()
+categorization_cache = LRUCache(maxsize=int(os.getenv("CATEGORIZATION_CACHE_SIZE", "50000")))
 
 def categorize_expense(description: str) -> Dict[str, any]:
     """Categorize expense and return category with confidence."""
-    category = categorizer.categorize(description)
-    confidence = categorizer.get_confidence_score(description, category)
-    
-    return {
-        "category": category,
-        "confidence": confidence,
-        "is_ai_categorized": True
-    }
+    return categorize_expenses([description])[0]
+
+def categorize_expenses(descriptions: List[str]) -> List[Dict[str, any]]:
+    """Categorize many descriptions, reusing results for repeated merchants.
+    
+    Results are cached on the cleaned description, so "SWIGGY*Order" and
+    "swiggy order" share one entry.
+    """
+    results = []
+    for description in descriptions:
+        description_clean = categorizer._clean(description)
+        cached = categorization_cache.get(description_clean)
+        if cached is None:
+            match = categorizer._match_clean(description_clean)
+            category = categorizer.categorize(description_clean, match)
+            cached = (category, categorizer.get_confidence_score(description_clean, category, match))
+            categorization_cache.set(description_clean, cached)
+        
+        category, confidence = cached
+        results.append({
+            "category": category,
+            "confidence": confidence,
+            "is_ai_categorized": True
+        })
+    
+    return results
 
 def get_spending_insights(transactions: List[Dict]) -> Dict[str, any]:
     """Generate spending insights from transactions."""
@@ -113,14 +206,18 @@ def get_spending_insights(transactions: List[Dict]) -> Dict[str, any]:
     
     # Calculate category totals
     category_totals = {}
-    total_expenses = 0
     
     for transaction in transactions:
         if transaction.get("transaction_type") == "expense":
             category = transaction.get("category", "Other")
             amount = abs(transaction.get("amount", 0))
             category_totals[category] = category_totals.get(category, 0) + amount
-            total_expenses += amount
+    
+    return spending_insights_from_totals(category_totals)
+
+def spending_insights_from_totals(category_totals: Dict[str, float]) -> Dict[str, any]:
+    """Generate spending insights from absolute expense totals per category."""
+    total_expenses = sum(category_totals.values())
     
     # Generate insights
     insights = []
@@ -0,0 +1,30 @@
+import os
+from sqlalchemy.orm import Session
+from ai_service import FinancialProfile
+from cache import LRUCache
+from metrics import stage
+from transaction_columns import load_transaction_columns
+from transaction_hooks import get_data_version
+
+# (user_id, data_version) -> FinancialProfile. Profiles are shared between
+# requests, so callers must treat them (and their arrays) as read-only. A
+# write bumps the data version, so stale profiles stop matching and age out.
+profile_cache = LRUCache(
+    maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "86400")),
+)
+
+def build_profile(db: Session, user_id: int) -> FinancialProfile:
+    """Scan a user's transactions once into a FinancialProfile."""
+    columns = load_transaction_columns(db, user_id)
+    with stage("analysis"):
+        return FinancialProfile.from_columns(columns)
+
+def get_financial_profile(db: Session, user_id: int) -> FinancialProfile:
+    """Serve a user's profile from cache while their data version is unchanged."""
+    key = (user_id, get_data_version(db, user_id))
+    profile = profile_cache.get(key)
+    if profile is None:
+        profile = build_profile(db, user_id)
+        profile_cache.set(key, profile)
+    return profile
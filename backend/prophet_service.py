@@ -0,0 +1,120 @@
+import glob
+import importlib.util
+import logging
+import os
+from typing import Dict, List, Optional
+import pandas as pd
+from worker_pool import WorkerPool
+
+PROPHET_AVAILABLE = importlib.util.find_spec("prophet") is not None
+PROPHET_WORKERS = int(os.getenv("PROPHET_WORKERS", "2"))
+# Jobs allowed to wait for a worker before new requests fall back
+PROPHET_QUEUE_SIZE = int(os.getenv("PROPHET_QUEUE_SIZE", str(PROPHET_WORKERS)))
+PROPHET_TIMEOUT = float(os.getenv("PROPHET_TIMEOUT", "15"))
+PROPHET_MODEL_DIR = os.getenv(
+    "PROPHET_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prophet_models")
+)
+SERIES = ("expenses", "income")
+
+def model_path(model_dir: str, user_id: int, data_version: int, series: str) -> str:
+    return os.path.join(model_dir, f"user-{user_id}-v{data_version}-{series}.json")
+
+def _init_worker():
+    # Stan logs every chain start/stop at INFO
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    # Warm-up: pay the slow prophet import once per worker, not per job
+    importlib.import_module("prophet")
+
+def _load_or_fit(model_dir: str, user_id: int, data_version: int, series: str, history: pd.DataFrame):
+    from prophet import Prophet
+    from prophet.serialize import model_from_json, model_to_json
+
+    path = model_path(model_dir, user_id, data_version, series)
+    if os.path.exists(path):
+        with open(path) as f:
+            return model_from_json(f.read())
+
+    model = Prophet(interval_width=0.95, weekly_seasonality=False, daily_seasonality=False)
+    model.fit(history)
+
+    os.makedirs(model_dir, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(model_to_json(model))
+    os.replace(temp_path, path)
+    # Models for older data versions can never be requested again
+    for stale in glob.glob(model_path(model_dir, user_id, "*", series)):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+    return model
+
+def fit_and_predict(model_dir: str, user_id: int, data_version: int, history: Dict[str, List],
+                    periods: int) -> Dict[str, List[float]]:
+    """Worker entry point: forecast each series, reusing a saved model when one exists.
+
+    ``history`` holds month-start dates under ``ds`` and one list of monthly
+    totals per series. Returns yhat and its 95% bounds per series, clipped at
+    zero (monthly totals can't be negative) and ordered lower <= yhat <= upper.
+    """
+    predictions = {}
+    for series in SERIES:
+        frame = pd.DataFrame({"ds": pd.to_datetime(history["ds"]), "y": history[series]})
+        model = _load_or_fit(model_dir, user_id, data_version, series, frame)
+        future = model.make_future_dataframe(periods=periods, freq="MS", include_history=False)
+        forecast = model.predict(future)[["yhat", "yhat_lower", "yhat_upper"]].clip(lower=0.0)
+        predictions[series] = forecast["yhat"].tolist()
+        predictions[f"{series}_lower"] = forecast[["yhat", "yhat_lower"]].min(axis=1).tolist()
+        predictions[f"{series}_upper"] = forecast[["yhat", "yhat_upper"]].max(axis=1).tolist()
+    return predictions
+
+class ProphetPool(WorkerPool):
+    """Process pool for Prophet fits. Stan cannot be interrupted mid-fit, so
+    a fit that times out still finishes and saves its model for the next request."""
+
+    def __init__(self, workers: int = PROPHET_WORKERS, queue_size: int = PROPHET_QUEUE_SIZE,
+                 timeout: float = PROPHET_TIMEOUT):
+        super().__init__("Prophet", workers, queue_size, timeout, initializer=_init_worker)
+
+    def stats(self) -> Dict:
+        return {"available": PROPHET_AVAILABLE, **super().stats()}
+
+prophet_pool = ProphetPool()
+
+def prophet_forecast(user_id: int, data_version: int, data: pd.DataFrame, periods: int = 6,
+                     model_dir: str = PROPHET_MODEL_DIR) -> Optional[List[Dict]]:
+    """Forecast a prepare_rollup_data frame with Prophet in the worker pool.
+
+    Returns rows shaped like simple_forecast's, or None when Prophet is not
+    installed, the history is too short, the pool is busy or the job timed
+    out; callers fall back to simple_forecast.
+    """
+    if not PROPHET_AVAILABLE or len(data) < 2:
+        return None
+    history = {
+        "ds": [month.start_time.isoformat() for month in data["month"]],
+        "expenses": data["expenses"].astype(float).tolist(),
+        "income": data["income"].astype(float).tolist(),
+    }
+    predictions = prophet_pool.run(fit_and_predict, model_dir, user_id, data_version, history, periods)
+    if predictions is None:
+        return None
+
+    rows = []
+    for i in range(periods):
+        expenses = predictions["expenses"][i]
+        income = predictions["income"][i]
+        rows.append({
+            "period": f"Month +{i + 1}",
+            "predicted_expenses": expenses,
+            "predicted_income": income,
+            "predicted_savings": income - expenses,
+            "expenses_lower": predictions["expenses_lower"][i],
+            "expenses_upper": predictions["expenses_upper"][i],
+            "income_lower": predictions["income_lower"][i],
+            "income_upper": predictions["income_upper"][i],
+            "confidence": max(95 - (i + 1) * 5, 60),
+        })
+    return rows
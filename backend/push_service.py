@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+
+PUSH_MAX_CONNECTIONS = int(os.getenv("PUSH_MAX_CONNECTIONS", "1000"))
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", "64"))
+PUSH_HEARTBEAT_SECONDS = float(os.getenv("PUSH_HEARTBEAT_SECONDS", "15"))
+# How often a channel re-checks the database for writes made by other workers
+PUSH_RESYNC_SECONDS = float(os.getenv("PUSH_RESYNC_SECONDS", "30"))
+
+_RESYNC = "resync"  # queue marker: send a full snapshot instead of the dropped deltas
+
+def transaction_snapshot(transaction) -> Dict:
+    """The fields pushed for a transaction, read while the ORM object is loaded."""
+    return {
+        "id": transaction.id,
+        "description": transaction.description,
+        "amount": transaction.amount,
+        "category": transaction.category,
+        "transaction_type": transaction.transaction_type,
+        "date": transaction.date,
+        "is_ai_categorized": transaction.is_ai_categorized,
+    }
+
+def format_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+def apply_change(summary: Dict, sign: int, row: Dict):
+    """Update an /analytics/summary-shaped dict in place for one added or removed row."""
+    if row["transaction_type"] == "income":
+        summary["total_income"] += sign * row["amount"]
+    elif row["transaction_type"] == "expense":
+        amount = sign * abs(row["amount"])
+        summary["total_expenses"] += amount
+        categories = summary["category_breakdown"]
+        remaining = categories.get(row["category"], 0) + amount
+        if abs(remaining) < 1e-9:
+            categories.pop(row["category"], None)
+        else:
+            categories[row["category"]] = remaining
+    summary["net_savings"] = summary["total_income"] - summary["total_expenses"]
+    total_income = summary["total_income"]
+    summary["savings_rate"] = summary["net_savings"] / total_income * 100 if total_income > 0 else 0
+
+class Subscription:
+    def __init__(self, channel: "UserChannel", queue_size: int):
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, message: str) -> bool:
+        """Queue a message; on overflow replace the backlog with one resync. False if it overflowed."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+            return False
+
+class UserChannel:
+    """One user's live summary, shared by all of their connections on this worker."""
+
+    def __init__(self, user_id: int, summary: Dict, data_version: int):
+        self.user_id = user_id
+        self.summary = summary
+        self.data_version = data_version
+        self.checked_at = monotonic()
+        self.subscribers: Set[Subscription] = set()
+
+    def snapshot(self) -> str:
+        return format_event("snapshot", {"summary": self.summary})
+
+class PushHub:
+    """Per-worker fan-out of transaction deltas to server-sent event streams.
+
+    Writes happen on threadpool threads and call ``publish``; delivery runs
+    on the event loop. Each connection has a bounded queue: a client that
+    falls behind has its backlog replaced by a single snapshot, so a slow
+    reader costs neither memory nor other readers' latency. Only writes
+    handled by this worker are pushed immediately; each channel re-checks
+    the user's data version every PUSH_RESYNC_SECONDS to pick up the rest.
+    Deltas carry the version their commit produced: ones the channel's
+    summary already covers are dropped, and one that skips a version makes
+    the channel reload instead of applying it on top of a stale summary.
+    """
+
+    def __init__(self, max_connections: int = PUSH_MAX_CONNECTIONS, queue_size: int = PUSH_QUEUE_SIZE):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self._channels: Dict[int, UserChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = Lock()
+        self.connections = 0
+        self.rejected = 0
+        self.events = 0
+        self.overflows = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self, user_id: int, summary: Dict, data_version: int) -> Optional[Subscription]:
+        """Open a stream for a user (on the loop); None when this worker is at its connection cap."""
+        with self._lock:
+            if self.connections >= self.max_connections:
+                self.rejected += 1
+                return None
+            self.connections += 1
+        channel = self._channels.get(user_id)
+        if channel is None:
+            channel = self._channels[user_id] = UserChannel(user_id, summary, data_version)
+        else:
+            self.resync(channel, summary, data_version)
+        subscription = Subscription(channel, self.queue_size)
+        channel.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        channel = subscription.channel
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers and self._channels.get(channel.user_id) is channel:
+            del self._channels[channel.user_id]
+        with self._lock:
+            self.connections -= 1
+
+    def has_subscribers(self, user_id: int) -> bool:
+        return user_id in self._channels
+
+    def publish(self, user_id: int, event: str, changes: List[Tuple[int, Dict]], data_version: int):
+        """Push committed changes, as (sign, row) pairs, to a user's streams. Safe from any thread.
+
+        ``data_version`` is the user's version as of the commit that made the
+        changes, so a channel can tell whether its summary already has them.
+        """
+        if self._loop is None or user_id not in self._channels:
+            return
+        self._loop.call_soon_threadsafe(self._deliver, user_id, event, changes, data_version)
+
+    def invalidate(self, user_id: int, event: str, data: Dict):
+        """Tell a user's streams about a bulk change; they reload the summary from the database."""
+        if self._loop is None or user_id not in self._channels:
+            return
+        self._loop.call_soon_threadsafe(self._invalidate, user_id, event, data)
+
+    def _invalidate(self, user_id: int, event: str, data: Dict):
+        channel = self._channels.get(user_id)
+        if channel is None:
+            return
+        channel.checked_at = float("-inf")
+        self.broadcast(channel, format_event(event, data))
+
+    def _deliver(self, user_id: int, event: str, changes: List[Tuple[int, Dict]], data_version: int):
+        channel = self._channels.get(user_id)
+        # A resync that ran after the commit already read these changes
+        if channel is None or data_version <= channel.data_version:
+            return
+        rows = [{"sign": sign, "transaction": row} for sign, row in changes]
+        if data_version != channel.data_version + 1:
+            # Another worker's write is missing from the summary; reload it rather than build on it
+            self._invalidate(user_id, event, {"changes": rows})
+            return
+        channel.data_version = data_version
+        for sign, row in changes:
+            apply_change(channel.summary, sign, row)
+        message = format_event(event, {"changes": rows, "summary": channel.summary})
+        self.broadcast(channel, message)
+
+    def broadcast(self, channel: UserChannel, message: str):
+        self.events += 1
+        for subscription in channel.subscribers:
+            if not subscription.offer(message):
+                self.overflows += 1
+
+    def resync(self, channel: UserChannel, summary: Dict, data_version: int):
+        """Replace a channel's summary with a fresh read and push it as a snapshot."""
+        channel.checked_at = monotonic()
+        if data_version <= channel.data_version:
+            return
+        channel.summary = summary
+        channel.data_version = data_version
+        self.broadcast(channel, channel.snapshot())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            connections, rejected = self.connections, self.rejected
+        return {
+            "connections": connections,
+            "max_connections": self.max_connections,
+            "users": len(self._channels),
+            "rejected": rejected,
+            "events": self.events,
+            "overflows": self.overflows,
+        }
+
+push_hub = PushHub()
+
+async def event_stream(subscription: Subscription, load_summary, heartbeat: float = PUSH_HEARTBEAT_SECONDS):
+    """Server-sent events for one connection; ``load_summary`` is an async () -> (summary, data_version)."""
+    channel = subscription.channel
+    try:
+        yield channel.snapshot()
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                message = None
+            if message is None:
+                yield f": keepalive {datetime.utcnow().isoformat()}\n\n"
+            else:
+                yield channel.snapshot() if message is _RESYNC else message
+            if monotonic() - channel.checked_at >= PUSH_RESYNC_SECONDS:
+                channel.checked_at = monotonic()
+                summary, data_version = await load_summary()
+                push_hub.resync(channel, summary, data_version)
+    finally:
+        push_hub.unsubscribe(subscription)
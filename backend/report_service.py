@@ -0,0 +1,309 @@
+import calendar
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from models import Goal, MonthlyRollup
+from metrics import stage
+from worker_pool import WorkerPool
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+# Renders allowed to wait for a worker before requests are turned away
+REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE", str(REPORT_WORKERS * 4)))
+REPORT_TIMEOUT = float(os.getenv("REPORT_TIMEOUT", "30"))
+REPORT_CACHE_DIR = os.getenv(
+    "REPORT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_cache")
+)
+# Bump when the report layout changes so cached files are not reused
+REPORT_LAYOUT_VERSION = 1
+
+def _ordinal(year: int, month: int) -> int:
+    return year * 12 + month - 1
+
+def _year_month(ordinal: int) -> Tuple[int, int]:
+    return ordinal // 12, ordinal % 12 + 1
+
+def report_months(kind: str, year: int, month: Optional[int]) -> Tuple[range, range]:
+    """Month ordinals covered by a report and by the period it is compared with."""
+    if kind == "monthly":
+        current = _ordinal(year, month)
+        return range(current, current + 1), range(current - 1, current)
+    start = _ordinal(year, 1)
+    return range(start, start + 12), range(start - 12, start)
+
+def period_label(kind: str, year: int, month: Optional[int]) -> str:
+    return f"{year}-{month:02d}" if kind == "monthly" else str(year)
+
+def load_inputs(db: Session, user_id: int, kind: str, year: int, month: Optional[int] = None,
+                now: Optional[datetime] = None) -> Dict:
+    """Everything a report is built from: rollup rows for the period and the one before, and goals."""
+    months, previous = report_months(kind, year, month)
+    period = MonthlyRollup.year * 12 + MonthlyRollup.month - 1
+    rollups = db.query(
+        MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.category,
+        MonthlyRollup.transaction_type, MonthlyRollup.total,
+    ).filter(
+        MonthlyRollup.user_id == user_id, MonthlyRollup.count > 0,
+        period >= previous.start, period < months.stop,
+    ).order_by(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.category, MonthlyRollup.transaction_type)
+    goals = db.query(
+        Goal.id, Goal.name, Goal.target_amount, Goal.current_amount, Goal.target_date, Goal.is_completed
+    ).filter(Goal.user_id == user_id).order_by(Goal.target_date, Goal.id)
+
+    now = now or datetime.utcnow()
+    return {
+        "layout": REPORT_LAYOUT_VERSION,
+        "kind": kind,
+        "year": year,
+        "month": month,
+        "is_closed": months.stop <= _ordinal(now.year, now.month),
+        "rollups": [list(row) for row in rollups],
+        "goals": [
+            [goal.id, goal.name, goal.target_amount, goal.current_amount or 0.0,
+             goal.target_date.isoformat(), bool(goal.is_completed)]
+            for goal in goals
+        ],
+    }
+
+def inputs_digest(inputs: Dict) -> str:
+    """Version of a report: changes exactly when something it is built from changes."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+def _percent_change(current: float, previous: float) -> Optional[float]:
+    return round((current - previous) / previous * 100, 2) if previous else None
+
+def _totals(rollups: List[List], months: range) -> Dict:
+    income = expenses = 0.0
+    categories: Dict[str, float] = {}
+    for year, month, category, transaction_type, total in rollups:
+        if _ordinal(year, month) not in months:
+            continue
+        if transaction_type == "income":
+            income += total
+        elif transaction_type == "expense":
+            expenses += total
+            categories[category] = categories.get(category, 0.0) + total
+    net_savings = income - expenses
+    return {
+        "total_income": income,
+        "total_expenses": expenses,
+        "net_savings": net_savings,
+        "savings_rate": net_savings / income * 100 if income > 0 else 0,
+        "categories": categories,
+    }
+
+def build_report(inputs: Dict) -> Dict:
+    """Report for one month or year: totals, category breakdown, change vs the previous period and goals."""
+    kind, year, month = inputs["kind"], inputs["year"], inputs["month"]
+    months, previous_months = report_months(kind, year, month)
+    current = _totals(inputs["rollups"], months)
+    previous = _totals(inputs["rollups"], previous_months)
+    categories = current.pop("categories")
+    previous_categories = previous.pop("categories")
+
+    report = {
+        "type": kind,
+        "period": period_label(kind, year, month),
+        "is_closed": inputs["is_closed"],
+        "summary": current,
+        "previous": previous,
+        "change": {
+            "income_pct": _percent_change(current["total_income"], previous["total_income"]),
+            "expenses_pct": _percent_change(current["total_expenses"], previous["total_expenses"]),
+            "net_savings_pct": _percent_change(current["net_savings"], previous["net_savings"]),
+        },
+        "categories": [
+            {
+                "category": category,
+                "amount": amount,
+                "share": amount / current["total_expenses"] * 100 if current["total_expenses"] else 0,
+                "previous": previous_categories.get(category, 0.0),
+                "change_pct": _percent_change(amount, previous_categories.get(category, 0.0)),
+            }
+            for category, amount in sorted(categories.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "goals": [
+            {
+                "id": goal_id,
+                "name": name,
+                "target_amount": target,
+                "current_amount": saved,
+                "progress_pct": min(saved / target * 100, 100.0) if target > 0 else 0,
+                "target_date": target_date,
+                "is_completed": is_completed,
+            }
+            for goal_id, name, target, saved, target_date, is_completed in inputs["goals"]
+        ],
+    }
+    if kind == "annual":
+        monthly = []
+        previous_expenses = _totals(inputs["rollups"], range(months.start - 1, months.start))["total_expenses"]
+        for ordinal in months:
+            totals = _totals(inputs["rollups"], range(ordinal, ordinal + 1))
+            monthly.append({
+                "period": "%d-%02d" % _year_month(ordinal),
+                "total_income": totals["total_income"],
+                "total_expenses": totals["total_expenses"],
+                "net_savings": totals["net_savings"],
+                "expenses_change_pct": _percent_change(totals["total_expenses"], previous_expenses),
+            })
+            previous_expenses = totals["total_expenses"]
+        report["months"] = monthly
+    return report
+
+def _money(amount: float) -> str:
+    return f"Rs. {amount:,.2f}"
+
+def _change(percent: Optional[float]) -> str:
+    return "-" if percent is None else f"{percent:+.1f}%"
+
+def report_lines(report: Dict) -> List[str]:
+    """Plain-text layout of a report, one fixed-width line per entry."""
+    if report["type"] == "monthly":
+        year, month = map(int, report["period"].split("-"))
+        title = f"Monthly Report - {calendar.month_name[month]} {year}"
+        previous_label = "Prev. month"
+    else:
+        title = f"Annual Report - {report['period']}"
+        previous_label = "Prev. year"
+    summary, previous, change = report["summary"], report["previous"], report["change"]
+    lines = [title, "" if report["is_closed"] else "(period still open; figures may change)", "",
+             "SUMMARY", f"{'':<16}{'This period':>18}{previous_label:>18}{'Change':>10}"]
+    for label, key, change_key in (("Income", "total_income", "income_pct"),
+                                   ("Expenses", "total_expenses", "expenses_pct"),
+                                   ("Net savings", "net_savings", "net_savings_pct")):
+        lines.append(f"{label:<16}{_money(summary[key]):>18}{_money(previous[key]):>18}{_change(change[change_key]):>10}")
+    lines.append(f"{'Savings rate':<16}{summary['savings_rate']:>17.1f}%{previous['savings_rate']:>17.1f}%")
+
+    lines += ["", "SPENDING BY CATEGORY", f"{'Category':<22}{'Amount':>18}{'Share':>8}{'Change':>10}"]
+    for row in report["categories"]:
+        lines.append(f"{row['category'][:21]:<22}{_money(row['amount']):>18}{row['share']:>7.1f}%"
+                     f"{_change(row['change_pct']):>10}")
+    if not report["categories"]:
+        lines.append("No expenses recorded.")
+
+    if "months" in report:
+        lines += ["", "MONTH BY MONTH", f"{'Month':<10}{'Income':>18}{'Expenses':>18}{'Savings':>18}{'MoM':>10}"]
+        for row in report["months"]:
+            lines.append(f"{row['period']:<10}{_money(row['total_income']):>18}{_money(row['total_expenses']):>18}"
+                         f"{_money(row['net_savings']):>18}{_change(row['expenses_change_pct']):>10}")
+
+    lines += ["", "GOALS"]
+    for goal in report["goals"]:
+        status = "done" if goal["is_completed"] else f"by {goal['target_date'][:10]}"
+        lines.append(f"{goal['name'][:21]:<22}{_money(goal['current_amount']):>18} of "
+                     f"{_money(goal['target_amount'])} ({goal['progress_pct']:.0f}%, {status})")
+    if not report["goals"]:
+        lines.append("No goals set.")
+    return lines
+
+def _pdf_text(line: str) -> str:
+    text = line.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def pdf_document(lines: List[str], font_size: int = 9, lines_per_page: int = 70) -> bytes:
+    """A minimal PDF of fixed-width text lines (Courier, A4), needing no PDF library."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    leading = font_size + 2
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for page in pages:
+        text = "".join(f"({_pdf_text(line)}) Tj T*\n" for line in page)
+        stream = f"BT /F1 {font_size} Tf {leading} TL 40 800 Td\n{text}ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+def render_pdf(report: Dict) -> bytes:
+    """Worker entry point: lay out and render one report."""
+    return pdf_document(report_lines(report))
+
+class ReportCache:
+    """Rendered reports on disk, one file per (user, kind, period, inputs digest).
+
+    A closed period's inputs no longer change, so it is rendered once; an
+    open period gets a new file after each write that touches it, and the
+    superseded file is removed.
+    """
+
+    def __init__(self, cache_dir: str = REPORT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, user_id: int, period: str, digest: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"user-{user_id}", f"{period}-{digest}.{extension}")
+
+    def get(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, path: str, content: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        # Renders of the same report from older inputs can never be requested again
+        name, extension = os.path.basename(path).rsplit(".", 1)
+        prefix = name.rpartition("-")[0]
+        for stale in glob.glob(os.path.join(os.path.dirname(path), f"{prefix}-*.{extension}")):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+report_pool = WorkerPool("Report", REPORT_WORKERS, REPORT_QUEUE_SIZE, REPORT_TIMEOUT)
+report_cache = ReportCache()
+
+def get_report(db: Session, user_id: int, kind: str, year: int, month: Optional[int] = None) -> Dict:
+    """A report as JSON, built from the handful of rollup rows it covers."""
+    return build_report(load_inputs(db, user_id, kind, year, month))
+
+def get_report_pdf(db: Session, user_id: int, kind: str, year: int, month: Optional[int] = None) -> Optional[bytes]:
+    """A rendered report, from disk when its inputs are unchanged; None if the render pool is busy or timed out."""
+    inputs = load_inputs(db, user_id, kind, year, month)
+    path = report_cache.path(user_id, f"{kind}-{period_label(kind, year, month)}", inputs_digest(inputs), "pdf")
+    content = report_cache.get(path)
+    if content is None:
+        with stage("render"):
+            content = report_pool.run(render_pdf, build_report(inputs))
+        if content is not None:
+            report_cache.put(path, content)
+    return content
@@ -0,0 +1,234 @@
+import inspect
+import os
+import sys
+import time
+from collections import Counter
+from functools import wraps
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Dict, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from metrics import PrometheusText, RequestMetrics, RequestTimings, current_request, stage
+
+# Requests slower than this (to the first response byte) get their sampled
+# stacks written out; 0 leaves the profiler off and its sampler never starts
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+
+request_metrics = RequestMetrics()
+
+class TimedRoute(APIRoute):
+    """APIRoute that times the endpoint body as the "endpoint" stage.
+
+    The moment the endpoint returns is kept so the middleware can time
+    response validation and serialization ("serialize") up to the first byte.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
+
+def _timed(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            with stage("endpoint"):
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    _endpoint_done()
+    else:
+        @wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            with stage("endpoint"):
+                try:
+                    return endpoint(*args, **kwargs)
+                finally:
+                    _endpoint_done()
+    return timed_endpoint
+
+def _endpoint_done():
+    timings = current_request.get()
+    if timings is not None:
+        timings.endpoint_done = perf_counter()
+
+def instrument_engine(engine):
+    """Count time spent executing SQL as the "db" stage of the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_request.get() is not None:
+            context._stage_start = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = current_request.get()
+        start = getattr(context, "_stage_start", None)
+        if timings is not None and start is not None:
+            timings.add("db", perf_counter() - start)
+
+class SlowRequestProfiler:
+    """Samples the stacks of threads working on in-flight requests.
+
+    Each stage records the thread it runs on, so sync endpoints are sampled
+    on their threadpool thread and async ones on the event loop (where stacks
+    can include other requests sharing the loop). Requests that end up slower
+    than the threshold are written as folded stacks, one file per request,
+    ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, threshold_ms: float, interval: float = PROFILE_SAMPLE_INTERVAL,
+                 directory: str = PROFILE_DIR):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self.directory = directory
+        self.written = 0
+        self._active: Dict[int, tuple] = {}  # id(timings) -> (timings, Counter of folded stacks)
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def begin(self, timings: RequestTimings):
+        with self._lock:
+            self._active[id(timings)] = (timings, Counter())
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+
+    def end(self, timings: RequestTimings, method: str, route: str, seconds: float):
+        """Stop sampling the request; write its stacks if it took at least the threshold."""
+        with self._lock:
+            _, samples = self._active.pop(id(timings), (None, None))
+        if samples and seconds >= self.threshold:
+            self._write(samples, method, route, seconds)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                active = list(self._active.values())
+            for timings, samples in active:
+                for thread_id in list(timings.threads):
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_fold(frame)] += 1
+
+    def _write(self, samples: Counter, method: str, route: str, seconds: float):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        path = os.path.join(self.directory, f"{time.time():.3f}-{method}-{slug}-{seconds * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        with self._lock:
+            self.written += 1
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "active": len(self._active),
+                "written": self.written,
+            }
+
+def _fold(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+profiler = SlowRequestProfiler(PROFILE_SLOW_REQUEST_MS) if PROFILE_SLOW_REQUEST_MS > 0 else None
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording per-route latency, stage times and rows loaded.
+
+    Routes are labelled by their path template ("/goals/{goal_id}"), so the
+    number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = current_request.set(timings)
+        start = perf_counter()
+        status = 500
+        first_byte = None
+        if profiler is not None:
+            profiler.begin(timings)
+
+        async def timed_send(message):
+            nonlocal status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = perf_counter()
+                if timings.endpoint_done is not None:
+                    timings.add("serialize", first_byte - timings.endpoint_done)
+                # Streamed bodies are not part of the profile
+                timings.threads.clear()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            current_request.reset(token)
+            end = perf_counter()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_metrics.observe(scope["method"], route, status, end - start, timings)
+            if profiler is not None:
+                profiler.end(timings, scope["method"], route, (first_byte or end) - start)
+
+def render_metrics(caches: Dict[str, Dict], components: Dict[str, Dict], pool_stats: Dict) -> str:
+    """Everything /metrics serves, in Prometheus text format.
+
+    ``caches`` maps a cache name to its stats() (hits and misses at least),
+    ``components`` maps a component name to any stats() dict whose numeric
+    values become gauges, and ``pool_stats`` is database.get_pool_stats().
+    """
+    text = PrometheusText()
+    requests = sorted(request_metrics.requests.items())
+    text.metric("http_requests_total", "counter", "Requests handled, by route and status.",
+                [({"method": method, "route": route, "status": status}, count)
+                 for (method, route, status), count in requests])
+    text.histogram("http_request_duration_seconds", "Request latency to the last byte, by route.",
+                   [({"method": method, "route": route}, histogram.snapshot())
+                    for (method, route), histogram in sorted(request_metrics.latency.items())])
+    text.histogram("http_request_stage_seconds", "Time per request spent in each stage, by route.",
+                   [({"route": route, "stage": name}, histogram.snapshot())
+                    for (route, name), histogram in sorted(request_metrics.stages.items())])
+    text.histogram("http_request_rows_loaded", "Database rows loaded per request, by route.",
+                   [({"route": route}, histogram.snapshot())
+                    for route, histogram in sorted(request_metrics.rows.items())])
+
+    for counter in ("hits", "misses", "evictions", "expirations"):
+        text.metric(f"cache_{counter}_total", "counter", f"Cache {counter}.",
+                    [({"cache": name}, stats.get(counter)) for name, stats in caches.items()])
+    text.metric("cache_size", "gauge", "Entries currently cached.",
+                [({"cache": name}, stats.get("size")) for name, stats in caches.items()])
+    text.metric("cache_hit_ratio", "gauge", "Hits over lookups since start.",
+                [({"cache": name}, _hit_ratio(stats)) for name, stats in caches.items()])
+
+    text.histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+                   [({}, pool_stats["checkout_wait_seconds"])])
+    text.metric("db_pool_stat", "gauge", "Database pool occupancy and error counters.",
+                [({"stat": key}, value) for key, value in pool_stats.items() if _is_number(value)])
+    text.metric("component_stat", "gauge", "Counters and gauges reported by background components.",
+                [({"component": name, "stat": key}, float(value))
+                 for name, stats in components.items() for key, value in stats.items() if _is_number(value)])
+    return text.render()
+
+def _hit_ratio(stats: Dict) -> Optional[float]:
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    return stats["hits"] / lookups if lookups else None
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float))
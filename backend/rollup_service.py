@@ -0,0 +1,190 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from sqlalchemy import case, delete, extract, func, insert, select
+from sqlalchemy.orm import Session
+from models import MonthlyRollup, Transaction
+from metrics import record_rows
+
+RollupKey = Tuple[int, int, int, str, str]
+
+def _rollup_value(transaction_type: str, amount: float) -> float:
+    """Amount as the analytics read it: expenses by magnitude, income as-is."""
+    return abs(amount) if transaction_type == "expense" else amount
+
+def _rollup_key(transaction) -> Tuple[RollupKey, float]:
+    if isinstance(transaction, Mapping):
+        fields = (transaction["user_id"], transaction["date"], transaction["category"],
+                  transaction["transaction_type"], transaction["amount"])
+    else:
+        fields = (transaction.user_id, transaction.date, transaction.category,
+                  transaction.transaction_type, transaction.amount)
+    user_id, date, category, transaction_type, amount = fields
+    key = (user_id, date.year, date.month, category, transaction_type)
+    return key, _rollup_value(transaction_type, amount)
+
+def apply_transactions(db: Session, transactions: Iterable, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) transactions from the monthly rollups.
+
+    Deltas are aggregated per rollup key first, so a batch costs one upsert per
+    touched (month, category, type) rather than one per transaction. Nothing is
+    committed here; the caller commits together with the transaction rows.
+    """
+    deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0.0, 0, 0.0])
+    for transaction in transactions:
+        key, value = _rollup_key(transaction)
+        delta = deltas[key]
+        delta[0] += sign * value
+        delta[1] += sign
+        delta[2] += sign * value * value
+    if not deltas:
+        return
+
+    rows = [
+        {"user_id": key[0], "year": key[1], "month": key[2], "category": key[3],
+         "transaction_type": key[4], "total": total, "count": count, "sum_of_squares": sum_of_squares}
+        for key, (total, count, sum_of_squares) in deltas.items()
+    ]
+    _upsert(db, rows)
+
+    if sign < 0:
+        user_ids = {key[0] for key in deltas}
+        db.execute(delete(MonthlyRollup).where(
+            MonthlyRollup.user_id.in_(user_ids), MonthlyRollup.count <= 0
+        ))
+
+def _upsert(db: Session, rows: List[Dict]):
+    """Increment existing rollup rows or insert new ones."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            key = (row["user_id"], row["year"], row["month"], row["category"], row["transaction_type"])
+            rollup = db.get(MonthlyRollup, key, with_for_update=True)
+            if rollup is None:
+                db.add(MonthlyRollup(**row))
+            else:
+                rollup.total += row["total"]
+                rollup.count += row["count"]
+                rollup.sum_of_squares += row["sum_of_squares"]
+        db.flush()
+        return
+
+    statement = dialect_insert(MonthlyRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=[MonthlyRollup.user_id, MonthlyRollup.year, MonthlyRollup.month,
+                        MonthlyRollup.category, MonthlyRollup.transaction_type],
+        set_={
+            "total": MonthlyRollup.total + statement.excluded.total,
+            "count": MonthlyRollup.count + statement.excluded.count,
+            "sum_of_squares": MonthlyRollup.sum_of_squares + statement.excluded.sum_of_squares,
+        },
+    )
+    db.execute(statement, rows)
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute rollups from raw transactions for one user, or everyone.
+
+    Runs as a single INSERT ... SELECT inside the caller's transaction and
+    returns the number of rollup rows written.
+    """
+    value = case((Transaction.transaction_type == "expense", func.abs(Transaction.amount)),
+                 else_=Transaction.amount)
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    source = select(
+        Transaction.user_id, year, month, Transaction.category, Transaction.transaction_type,
+        func.sum(value), func.count(), func.sum(value * value),
+    ).group_by(Transaction.user_id, year, month, Transaction.category, Transaction.transaction_type)
+
+    clear = delete(MonthlyRollup)
+    if user_id is not None:
+        source = source.where(Transaction.user_id == user_id)
+        clear = clear.where(MonthlyRollup.user_id == user_id)
+
+    db.execute(clear)
+    result = db.execute(insert(MonthlyRollup).from_select(
+        ["user_id", "year", "month", "category", "transaction_type", "total", "count", "sum_of_squares"],
+        source,
+    ))
+    return result.rowcount
+
+def _is_month_start(value: Optional[datetime]) -> bool:
+    return value is None or (value.day == 1 and value.time() == datetime.min.time())
+
+def can_summarize(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> bool:
+    """Whether a date range lines up with whole months and can be read from rollups."""
+    return _is_month_start(start_date) and _is_month_start(end_date)
+
+def _in_range(query, start_date: Optional[datetime], end_date: Optional[datetime]):
+    period = MonthlyRollup.year * 12 + MonthlyRollup.month
+    if start_date is not None:
+        query = query.filter(period >= start_date.year * 12 + start_date.month)
+    if end_date is not None:
+        query = query.filter(period < end_date.year * 12 + end_date.month)
+    return query
+
+def summarize(db: Session, user_id: int, start_date: Optional[datetime] = None,
+              end_date: Optional[datetime] = None) -> dict:
+    """Same shape as main.summarize_transactions, read from the rollups.
+
+    Only valid for month-aligned ranges; see ``can_summarize``.
+    """
+    query = db.query(
+        MonthlyRollup.transaction_type,
+        MonthlyRollup.category,
+        func.sum(MonthlyRollup.total),
+    ).filter(MonthlyRollup.user_id == user_id, MonthlyRollup.count > 0)
+    query = _in_range(query, start_date, end_date)
+
+    total_income = 0
+    total_expenses = 0
+    categories = {}
+    for transaction_type, category, total in query.group_by(MonthlyRollup.transaction_type, MonthlyRollup.category):
+        if transaction_type == "income":
+            total_income += total
+        elif transaction_type == "expense":
+            total_expenses += total
+            categories[category] = total
+
+    net_savings = total_income - total_expenses
+    return {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_savings": net_savings,
+        "savings_rate": (net_savings / total_income * 100) if total_income > 0 else 0,
+        "category_breakdown": categories
+    }
+
+def monthly_rows(db: Session, user_id: int) -> List[Dict]:
+    """Per-month, per-category rollups for a user as plain dicts, oldest first."""
+    query = db.query(MonthlyRollup).filter(
+        MonthlyRollup.user_id == user_id, MonthlyRollup.count > 0
+    ).order_by(MonthlyRollup.year, MonthlyRollup.month)
+    rows = [
+        {"year": r.year, "month": r.month, "category": r.category, "transaction_type": r.transaction_type,
+         "total": r.total, "count": r.count, "sum_of_squares": r.sum_of_squares}
+        for r in query
+    ]
+    record_rows(len(rows))
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Rebuild monthly rollups from raw transactions.")
+    parser.add_argument("--user-id", type=int, help="Only rebuild this user (default: all users)")
+    args = parser.parse_args()
+
+    MonthlyRollup.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        written = rebuild(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rebuilt {written} rollup rows")
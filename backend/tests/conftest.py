@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+# The services import the database module; keep it off any real server
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def db():
+    """A session on fresh tables holding one user (id 1)."""
+    from database import SessionLocal, engine
+    from models import Base, User
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    session.add(User(email="test@example.com", username="test", hashed_password="x"))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
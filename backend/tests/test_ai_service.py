@@ -0,0 +1,26 @@
+import numpy as np
+from ai_service import forecast_rows, trend_forecast
+
+def test_two_months_give_no_interval():
+    result = trend_forecast(np.array([[1000.0, 1200.0]]), np.array([[5000.0, 5000.0]]), np.array([2]))
+    for row in forecast_rows(result, 0):
+        assert row["predicted_expenses"] > 0
+        assert row["expenses_lower"] is None and row["expenses_upper"] is None
+
+def test_interval_covers_next_month_about_95_percent():
+    # Flat series with noise: the point estimate is unbiased, so coverage should match the level
+    rng = np.random.default_rng(0)
+    users, months = 4000, 6
+    history = 1000 + rng.normal(0, 100, (users, months))
+    actual = 1000 + rng.normal(0, 100, users)
+    result = trend_forecast(history, history, np.full(users, months), periods=1)
+
+    lower, upper = result["expenses_lower"][:, 0], result["expenses_upper"][:, 0]
+    assert 0.93 <= np.mean((lower <= actual) & (actual <= upper)) <= 0.97
+
+def test_bounds_contain_the_clipped_point():
+    falling = np.array([[3000.0, 2000.0, 1200.0, 500.0, 100.0]])
+    result = trend_forecast(falling, falling, np.array([5]))
+    for row in forecast_rows(result, 0):
+        assert 0.0 <= row["expenses_lower"] <= row["predicted_expenses"] <= row["expenses_upper"]
+        assert row["predicted_savings"] == row["predicted_income"] - row["predicted_expenses"]
@@ -0,0 +1,41 @@
+import random
+from anomaly_service import RunningStats, add_observation, is_anomaly
+
+def alerts_for(amounts):
+    """Feed amounts through the online baseline as apply_transactions does; return the flagged ones."""
+    baseline = RunningStats()
+    flagged = []
+    for amount in amounts:
+        if is_anomaly(baseline, amount) is not None:
+            flagged.append(amount)
+        add_observation(baseline, amount)
+    return flagged
+
+def test_small_step_after_stable_amounts_is_not_flagged():
+    assert alerts_for([100, 101, 102, 103, 104] * 4 + [105]) == []
+
+def test_uniform_groceries_raise_no_alerts():
+    for seed in range(20):
+        rng = random.Random(seed)
+        assert alerts_for([rng.uniform(800, 1200) for _ in range(60)]) == []
+
+def test_rent_increase_is_not_flagged():
+    assert alerts_for([15000.0] * 12 + [15500.0] * 5) == []
+
+def test_large_outlier_is_flagged():
+    rng = random.Random(0)
+    history = [rng.lognormvariate(6, 0.4) for _ in range(200)]
+    assert alerts_for(history + [25000.0]) == [25000.0]
+
+def test_lognormal_spending_rarely_alerts():
+    flagged = 0
+    for seed in range(20):
+        rng = random.Random(seed)
+        flagged += len(alerts_for([rng.lognormvariate(6, 0.4) for _ in range(200)]))
+    assert flagged <= 4  # of 4000 ordinary expenses
+
+def test_outlier_does_not_mask_the_next_one():
+    rng = random.Random(1)
+    history = [rng.lognormvariate(6, 0.4) for _ in range(300)]
+    between = [rng.lognormvariate(6, 0.4) for _ in range(3)]
+    assert alerts_for(history + [25000.0] + between + [9000.0]) == [25000.0, 9000.0]
@@ -0,0 +1,73 @@
+from datetime import datetime
+from budget_service import BUDGET_SOURCE, create_budget, reconcile
+from models import AIInsight, Budget, Transaction
+from push_service import transaction_snapshot
+from transaction_hooks import record_changes, record_update
+
+MARCH = datetime(2026, 3, 5)
+
+def add_expense(db, amount: float, category: str = "Shopping", date: datetime = MARCH) -> Transaction:
+    transaction = Transaction(user_id=1, description="Store", amount=-amount, category=category,
+                              transaction_type="expense", date=date)
+    db.add(transaction)
+    record_changes(db, [transaction])
+    db.commit()
+    return transaction
+
+def edit(db, transaction: Transaction, **fields):
+    before = {**transaction_snapshot(transaction), "user_id": transaction.user_id}
+    for field, value in fields.items():
+        setattr(transaction, field, value)
+    record_update(db, before, transaction)
+    db.commit()
+
+def budget_alerts(db):
+    return [title for (title,) in db.query(AIInsight.title).filter(AIInsight.source == BUDGET_SOURCE)
+            .order_by(AIInsight.id)]
+
+def spent(db) -> float:
+    return db.query(Budget.current_spent).scalar()
+
+def test_each_threshold_alerts_once_on_the_way_up(db):
+    create_budget(db, 1, "Shopping", 1000.0, 2026, 3)
+    db.commit()
+    add_expense(db, 500.0)
+    add_expense(db, 350.0)
+    add_expense(db, 50.0)
+    assert budget_alerts(db) == ["Budget 80% Used: Shopping"]
+
+    add_expense(db, 200.0)
+    add_expense(db, 10.0)
+    assert budget_alerts(db) == ["Budget 80% Used: Shopping", "Budget Exceeded: Shopping"]
+    assert spent(db) == 1110.0
+
+def test_edit_that_keeps_the_amount_moves_nothing(db):
+    create_budget(db, 1, "Shopping", 1000.0, 2026, 3)
+    db.commit()
+    transaction = add_expense(db, 900.0)
+    for i in range(3):
+        edit(db, transaction, description=f"Store #{i}")
+    assert budget_alerts(db) == ["Budget 80% Used: Shopping"]
+    assert spent(db) == 900.0
+
+def test_edits_net_their_deltas(db):
+    create_budget(db, 1, "Shopping", 1000.0, 2026, 3)
+    db.commit()
+    transaction = add_expense(db, 700.0)
+    edit(db, transaction, amount=-750.0)
+    assert budget_alerts(db) == [] and spent(db) == 750.0
+
+    # Moving it to another month and category takes it out of this budget
+    edit(db, transaction, category="Travel", date=datetime(2026, 4, 2))
+    assert spent(db) == 0.0
+    edit(db, transaction, category="Shopping", date=MARCH, amount=-850.0)
+    assert budget_alerts(db) == ["Budget 80% Used: Shopping"]
+    assert reconcile(db, 1) == []
+
+def test_new_budget_starts_from_the_month_total(db):
+    add_expense(db, 600.0)
+    add_expense(db, 300.0, date=datetime(2026, 2, 27))
+    create_budget(db, 1, "Shopping", 500.0, 2026, 3)
+    db.commit()
+    assert spent(db) == 600.0
+    assert budget_alerts(db) == ["Budget 80% Used: Shopping", "Budget Exceeded: Shopping"]
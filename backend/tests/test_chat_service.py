@@ -0,0 +1,21 @@
+from datetime import datetime
+from chat_service import get_chat_summary, summary_cache
+from models import Transaction
+from transaction_hooks import record_changes
+
+def add_expense(db, amount: float):
+    transaction = Transaction(user_id=1, description="Groceries", amount=-amount, category="Food & Dining",
+                              transaction_type="expense", date=datetime(2026, 3, 5))
+    db.add(transaction)
+    record_changes(db, [transaction])
+    db.commit()
+
+def test_summary_read_before_a_write_is_not_served_after_it(db):
+    summary_cache.clear()
+    add_expense(db, 100.0)
+    stale = get_chat_summary(db, 1)
+    add_expense(db, 150.0)
+    # A request that read the summary before the commit stores it afterwards
+    summary_cache.set((1, 1), stale)
+
+    assert get_chat_summary(db, 1)["total_expenses"] == 250.0
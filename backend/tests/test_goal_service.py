@@ -0,0 +1,61 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from goal_service import BLOCK_MONTHS, get_goal_projection, projection_cache, simulate_savings
+from models import Goal, Transaction
+from transaction_hooks import record_changes
+
+def test_steady_savings_reach_the_target_on_schedule():
+    result = simulate_savings(np.array([1000.0]), 0.0, 5000.0, 12, 500, np.random.default_rng(0))
+    assert result["probability"] == 1.0
+    assert result["median_months_to_target"] == 5
+    assert result["final_balance"]["p50"] == 12000.0
+    assert result["bands"].shape == (5, 12)
+
+def test_first_hit_is_counted_across_blocks():
+    months = BLOCK_MONTHS + 40
+    result = simulate_savings(np.array([100.0]), 0.0, 100.0 * (BLOCK_MONTHS + 5), months, 100,
+                              np.random.default_rng(0))
+    assert result["median_months_to_target"] == BLOCK_MONTHS + 5
+
+def test_unreachable_target_has_no_median():
+    result = simulate_savings(np.array([-50.0, 20.0]), 1000.0, 5000.0, 24, 1000, np.random.default_rng(0))
+    assert result["probability"] == 0.0
+    assert result["median_months_to_target"] is None
+
+def test_probability_matches_a_per_path_loop():
+    savings = np.array([3000.0, -1000.0, 500.0, 1500.0])
+    target, months, paths = 8000.0, 12, 4000
+    result = simulate_savings(savings, 0.0, target, months, paths, np.random.default_rng(7))
+
+    rng = np.random.default_rng(7)
+    draws = savings[rng.integers(0, len(savings), size=(paths, months))]
+    reached = [(np.cumsum(row) >= target).any() for row in draws]
+    assert result["probability"] == np.mean(reached)
+
+def test_projection_is_seeded_and_cached_per_data_version(db):
+    goal = Goal(user_id=1, name="Car", target_amount=200000.0, current_amount=10000.0,
+                target_date=(pd.Timestamp.utcnow() + pd.DateOffset(years=3)).to_pydatetime().replace(tzinfo=None))
+    db.add(goal)
+    for month in range(1, 7):
+        for amount, transaction_type in [(50000.0, "income"), (-42000.0, "expense")]:
+            transaction = Transaction(user_id=1, description="x", amount=amount, category="Misc",
+                                      transaction_type=transaction_type, date=datetime(2026, month, 10))
+            db.add(transaction)
+            record_changes(db, [transaction])
+    db.commit()
+    projection_cache.clear()
+
+    first = get_goal_projection(db, goal, paths=2000)
+    projection_cache.clear()
+    assert get_goal_projection(db, goal, paths=2000) == first
+    assert get_goal_projection(db, goal, paths=2000) is get_goal_projection(db, goal, paths=2000)
+
+    transaction = Transaction(user_id=1, description="bonus", amount=100000.0, category="Income",
+                              transaction_type="income", date=datetime(2026, 6, 20))
+    db.add(transaction)
+    record_changes(db, [transaction])
+    db.commit()
+    after = get_goal_projection(db, goal, paths=2000)
+    assert after["data_version"] == first["data_version"] + 1
+    assert after["probability"] >= first["probability"]
@@ -0,0 +1,37 @@
+import io
+import json
+from import_service import import_transactions
+from models import Transaction
+
+def jsonl(*rows) -> io.BytesIO:
+    return io.BytesIO("".join(json.dumps(row) + "\n" for row in rows).encode())
+
+def test_non_text_values_are_coerced_or_reported(db):
+    result = import_transactions(db, 1, jsonl(
+        {"description": 5, "amount": -120, "category": "Shopping"},
+        {"description": "Rent", "amount": -15000, "category": ["Housing"], "type": {"kind": "expense"}},
+        {"description": "Salary", "amount": {"value": 50000}},
+    ), "jsonl")
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert db.query(Transaction.description).scalar() == "5"
+
+def test_undecodable_file_reports_committed_chunks(db):
+    # Text is decoded a block at a time, so chunks well before the bad bytes are committed
+    good = "".join(f"Coffee {i},-{100 + i % 50}\n" for i in range(3000))
+    data = ("description,amount\n" + good).encode() + "Café,-90\n".encode("latin-1") * 10
+    result = import_transactions(db, 1, io.BytesIO(data), "csv", chunk_size=500)
+
+    assert "UTF-8" in result["error"]
+    assert result["committed_chunks"][0] == [2, 501]
+    last_line = result["committed_chunks"][-1][1]
+    assert last_line <= 3001
+    assert result["imported"] == db.query(Transaction).count() == last_line - 1
+
+def test_non_finite_amounts_are_rejected(db):
+    rows = "description,amount\nLunch,-250\nNaN,nan\nInf,inf\nNegative inf,-Infinity\n"
+    result = import_transactions(db, 1, io.BytesIO(rows.encode()), "csv")
+
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [3, 4, 5]
+    assert all("finite" in error["error"] for error in result["errors"])
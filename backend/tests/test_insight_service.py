@@ -0,0 +1,66 @@
+import time
+from datetime import datetime
+import insight_service
+from insight_service import InsightWorker, refresh_user_insights
+from models import AIInsight, Transaction
+from transaction_hooks import record_changes
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+class FakeSession:
+    def close(self):
+        pass
+
+def test_burst_of_writes_costs_one_refresh(monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(insight_service, "refresh_user_insights", lambda db, user_id: refreshed.append(user_id))
+    worker = InsightWorker(FakeSession, workers=2, debounce=0.1, max_delay=5)
+    worker.start()
+    try:
+        for _ in range(20):
+            worker.mark_dirty([1])
+            worker.mark_dirty([2])
+            time.sleep(0.005)
+        assert wait_for(lambda: worker.stats()["processed"] == 2)
+        time.sleep(0.2)
+        assert sorted(refreshed) == [1, 2]
+    finally:
+        worker.stop()
+
+def test_steady_writes_are_refreshed_by_the_max_delay(monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(insight_service, "refresh_user_insights", lambda db, user_id: refreshed.append(user_id))
+    worker = InsightWorker(FakeSession, workers=1, debounce=0.1, max_delay=0.3)
+    worker.start()
+    try:
+        # Writes arrive faster than the debounce for a full second
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            worker.mark_dirty([1])
+            time.sleep(0.02)
+        assert len(refreshed) >= 2
+    finally:
+        worker.stop()
+
+def test_refresh_keeps_the_read_flag_of_unchanged_insights(db):
+    for amount, category in [(9000.0, "Shopping"), (1000.0, "Food & Dining")]:
+        transaction = Transaction(user_id=1, description=category, amount=-amount, category=category,
+                                  transaction_type="expense", date=datetime(2026, 3, 5))
+        db.add(transaction)
+        record_changes(db, [transaction])
+    db.commit()
+
+    stored = refresh_user_insights(db, 1)
+    assert stored > 0
+    first = db.query(AIInsight).filter(AIInsight.source == insight_service.SPENDING_SOURCE).first()
+    first.is_read = True
+    title = first.title
+    db.commit()
+
+    assert refresh_user_insights(db, 1) == stored
+    read = db.query(AIInsight.title).filter(AIInsight.is_read.is_(True)).all()
+    assert read == [(title,)]
@@ -0,0 +1,28 @@
+import pandas as pd
+import prophet_service
+
+class FallingModel:
+    """Stands in for a fitted Prophet whose trend runs below zero, with a band that misses yhat."""
+
+    def make_future_dataframe(self, periods, freq, include_history):
+        return pd.DataFrame({"ds": pd.date_range("2026-01-01", periods=periods, freq=freq)})
+
+    def predict(self, future):
+        yhat = pd.Series([300.0 - 200.0 * i for i in range(len(future))])
+        return pd.DataFrame({"yhat": yhat, "yhat_lower": yhat - 150.0, "yhat_upper": yhat - 10.0})
+
+def test_forecast_rows_are_clipped_and_ordered(monkeypatch):
+    monkeypatch.setattr(prophet_service, "PROPHET_AVAILABLE", True)
+    monkeypatch.setattr(prophet_service, "_load_or_fit", lambda *args: FallingModel())
+    monkeypatch.setattr(prophet_service.prophet_pool, "run", lambda fn, *args: fn(*args))
+    data = pd.DataFrame({"month": pd.period_range("2025-01", periods=6, freq="M"),
+                         "expenses": [1000.0] * 6, "income": [900.0] * 6})
+
+    rows = prophet_service.prophet_forecast(1, 0, data, periods=6)
+
+    assert len(rows) == 6
+    for row in rows:
+        for series in ("expenses", "income"):
+            point = row[f"predicted_{series}"]
+            assert 0.0 <= row[f"{series}_lower"] <= point <= row[f"{series}_upper"]
+        assert row["predicted_savings"] == row["predicted_income"] - row["predicted_expenses"]
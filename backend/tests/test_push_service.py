@@ -0,0 +1,48 @@
+import json
+from push_service import PushHub
+
+def summary(expenses):
+    return {"total_income": 1000.0, "total_expenses": expenses, "net_savings": 1000.0 - expenses,
+            "savings_rate": (1000.0 - expenses) / 10, "category_breakdown": {"Food": expenses}}
+
+def expense(amount):
+    return {"id": 1, "amount": -amount, "category": "Food", "transaction_type": "expense"}
+
+def events(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        message = subscription.queue.get_nowait()
+        event, data = message.split("\n")[:2]
+        messages.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return messages
+
+def test_delta_already_in_a_resynced_snapshot_is_dropped():
+    hub = PushHub()
+    subscription = hub.subscribe(1, summary(100.0), data_version=3)
+    channel = subscription.channel
+    # The resync read the summary after the commit of version 4, before its delta arrived
+    hub.resync(channel, summary(150.0), data_version=4)
+    hub._deliver(1, "created", [(1, expense(50.0))], data_version=4)
+
+    assert channel.summary["total_expenses"] == 150.0
+    assert [event for event, _ in events(subscription)] == ["snapshot"]
+
+def test_next_delta_is_applied_and_advances_the_version():
+    hub = PushHub()
+    subscription = hub.subscribe(1, summary(100.0), data_version=3)
+    hub._deliver(1, "created", [(1, expense(50.0))], data_version=4)
+
+    assert subscription.channel.data_version == 4
+    [(event, data)] = events(subscription)
+    assert event == "created" and data["summary"]["total_expenses"] == 150.0
+
+def test_delta_after_a_missed_version_forces_a_reload():
+    hub = PushHub()
+    subscription = hub.subscribe(1, summary(100.0), data_version=3)
+    hub._deliver(1, "created", [(1, expense(50.0))], data_version=5)
+
+    channel = subscription.channel
+    assert channel.summary["total_expenses"] == 100.0 and channel.data_version == 3
+    assert channel.checked_at == float("-inf")
+    [(event, data)] = events(subscription)
+    assert event == "created" and "summary" not in data
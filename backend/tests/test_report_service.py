@@ -0,0 +1,63 @@
+import os
+from datetime import datetime
+import pytest
+import report_service
+from models import Transaction
+from report_service import ReportCache, get_report, get_report_pdf
+from transaction_hooks import record_changes
+
+@pytest.fixture
+def renders(monkeypatch, tmp_path):
+    """Render in-process into a temporary cache; yields the list of rendered reports."""
+    rendered = []
+
+    def run(fn, report):
+        rendered.append(report)
+        return fn(report)
+
+    monkeypatch.setattr(report_service, "report_cache", ReportCache(str(tmp_path)))
+    monkeypatch.setattr(report_service.report_pool, "run", run)
+    return rendered
+
+def add(db, amount: float, date: datetime, category: str = "Food & Dining"):
+    transaction = Transaction(user_id=1, description="x", amount=amount, category=category,
+                              transaction_type="income" if amount > 0 else "expense", date=date)
+    db.add(transaction)
+    record_changes(db, [transaction])
+    db.commit()
+
+def cached_files(cache: ReportCache):
+    return sorted(os.listdir(os.path.join(cache.cache_dir, "user-1")))
+
+def test_closed_month_is_rendered_once_until_a_back_dated_write(db, renders):
+    add(db, 50000.0, datetime(2025, 2, 1), "Income")
+    add(db, -1200.0, datetime(2025, 2, 14))
+    first = get_report_pdf(db, 1, "monthly", 2025, 2)
+    assert first.startswith(b"%PDF") and len(renders) == 1
+
+    assert get_report_pdf(db, 1, "monthly", 2025, 2) == first
+    # Writes to months the report doesn't cover leave it cached
+    add(db, -800.0, datetime(2025, 6, 3))
+    assert get_report_pdf(db, 1, "monthly", 2025, 2) == first
+    assert len(renders) == 1
+    assert report_service.report_cache.stats() == {"hits": 2, "misses": 1}
+
+    add(db, -300.0, datetime(2025, 2, 20))
+    assert get_report_pdf(db, 1, "monthly", 2025, 2) != first
+    assert len(renders) == 2
+    assert renders[-1]["summary"]["total_expenses"] == 1500.0
+    # The superseded render is removed
+    assert len(cached_files(report_service.report_cache)) == 1
+
+def test_report_totals_compare_with_the_previous_period(db, renders):
+    add(db, -1000.0, datetime(2025, 1, 10))
+    add(db, -1500.0, datetime(2025, 2, 10))
+    add(db, -500.0, datetime(2025, 2, 11), "Shopping")
+    report = get_report(db, 1, "monthly", 2025, 2)
+
+    assert report["period"] == "2025-02" and report["is_closed"] is True
+    assert report["summary"]["total_expenses"] == 2000.0
+    assert report["previous"]["total_expenses"] == 1000.0
+    assert report["change"]["expenses_pct"] == 100.0
+    assert [row["category"] for row in report["categories"]] == ["Food & Dining", "Shopping"]
+    assert renders == []
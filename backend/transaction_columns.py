@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Transaction
+from metrics import record_rows
+
+TRANSACTION_TYPES = ("expense", "income")
+EXPENSE, INCOME = 0, 1
+_TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+NAT = np.iinfo(np.int64).min  # missing dates
+LOAD_CHUNK_SIZE = 10000
+
+class CategoryStats(NamedTuple):
+    """Per-category absolute expense statistics, ordered by category name."""
+    categories: List[str]
+    count: np.ndarray
+    total: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray  # sample std, 0 for single transactions
+
+class TransactionColumns(NamedTuple):
+    """A user's transactions as typed arrays, one element per transaction."""
+    dates: np.ndarray  # int64 seconds since the epoch, NAT when missing
+    amounts: np.ndarray  # float64, signed as stored
+    category_codes: np.ndarray  # int32 positions in ``categories``
+    type_codes: np.ndarray  # int8 positions in TRANSACTION_TYPES, -1 if unknown
+    categories: Tuple[str, ...]
+
+    @property
+    def size(self) -> int:
+        return len(self.amounts)
+
+    @classmethod
+    def empty(cls) -> "TransactionColumns":
+        return cls(np.empty(0, np.int64), np.empty(0), np.empty(0, np.int32), np.empty(0, np.int8), ())
+
+    @classmethod
+    def from_records(cls, transactions: List[Dict]) -> "TransactionColumns":
+        """Convert the legacy list-of-dicts input (dates may be strings)."""
+        if not transactions:
+            return cls.empty()
+        dates = pd.to_datetime([t.get("date") for t in transactions])
+        categories: Dict[str, int] = {}
+        return cls(
+            dates=dates.values.astype("datetime64[s]").astype(np.int64),
+            amounts=np.fromiter((t["amount"] for t in transactions), np.float64, len(transactions)),
+            category_codes=np.fromiter(
+                (categories.setdefault(t.get("category"), len(categories)) for t in transactions),
+                np.int32, len(transactions)),
+            type_codes=np.fromiter(
+                (_TYPE_CODES.get(t.get("transaction_type"), -1) for t in transactions),
+                np.int8, len(transactions)),
+            categories=tuple(categories),
+        )
+
+    def months(self) -> np.ndarray:
+        """Month ordinals (months since 1970-01, as pandas' monthly periods), NAT when undated."""
+        return self.dates.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+
+    def expense_category_stats(self) -> CategoryStats:
+        """Count, total, mean and std of absolute expense amounts per category."""
+        expense = self.type_codes == EXPENSE
+        return category_stats(self.category_codes[expense], np.abs(self.amounts[expense]), self.categories)
+
+def category_stats(codes: np.ndarray, amounts: np.ndarray, categories: Tuple[str, ...]) -> CategoryStats:
+    """Group ``amounts`` by category code into CategoryStats."""
+    size = len(categories)
+    count = np.bincount(codes, minlength=size)
+    present = np.flatnonzero(count)
+    order = present[np.argsort([categories[code] for code in present], kind="stable")]
+
+    total = np.bincount(codes, weights=amounts, minlength=size)
+    mean = np.divide(total, count, out=np.zeros(size), where=count > 0)
+    squares = np.bincount(codes, weights=(amounts - mean[codes]) ** 2, minlength=size)
+    std = np.sqrt(np.divide(squares, count - 1, out=np.zeros(size), where=count > 1))
+    return CategoryStats([categories[code] for code in order], count[order], total[order], mean[order], std[order])
+
+def as_columns(transactions) -> TransactionColumns:
+    """Accept either TransactionColumns or the legacy list of transaction dicts."""
+    if isinstance(transactions, TransactionColumns):
+        return transactions
+    return TransactionColumns.from_records(transactions)
+
+def load_transaction_columns(db: Session, user_id: int, start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             chunk_size: int = LOAD_CHUNK_SIZE) -> TransactionColumns:
+    """Read a user's transactions straight into TransactionColumns.
+
+    Only the four analysed columns are selected and rows are streamed in
+    chunks into typed arrays, so no ORM objects or per-row dicts are built.
+    ``start_date`` is inclusive and ``end_date`` exclusive, like the summary,
+    rollup and report date ranges.
+    """
+    query = select(
+        Transaction.date, Transaction.amount, Transaction.category, Transaction.transaction_type
+    ).where(Transaction.user_id == user_id)
+    if start_date:
+        query = query.where(Transaction.date >= start_date)
+    if end_date:
+        query = query.where(Transaction.date < end_date)
+
+    categories: Dict[str, int] = {}
+    date_chunks, amount_chunks, category_chunks, type_chunks = [], [], [], []
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for rows in result.partitions():
+        dates, amounts, row_categories, types = zip(*rows)
+        date_chunks.append(np.array(dates, dtype="datetime64[s]").astype(np.int64))
+        amount_chunks.append(np.array(amounts, dtype=np.float64))
+        category_chunks.append(np.fromiter(
+            (categories.setdefault(category, len(categories)) for category in row_categories),
+            np.int32, len(rows)))
+        type_chunks.append(np.fromiter((_TYPE_CODES.get(t, -1) for t in types), np.int8, len(rows)))
+
+    if not amount_chunks:
+        return TransactionColumns.empty()
+    record_rows(sum(len(chunk) for chunk in amount_chunks))
+    return TransactionColumns(
+        np.concatenate(date_chunks), np.concatenate(amount_chunks), np.concatenate(category_chunks),
+        np.concatenate(type_chunks), tuple(categories),
+    )
@@ -0,0 +1,75 @@
+from typing import Callable, Iterable, List, Mapping, Set
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from models import User
+import anomaly_service
+import budget_service
+import rollup_service
+
+# Callbacks run with the set of affected user ids once a write has committed
+_commit_listeners: List[Callable[[Set[int]], None]] = []
+
+def on_commit(listener: Callable[[Set[int]], None]) -> Callable[[Set[int]], None]:
+    """Register a callback for users whose transactions changed (usable as a decorator)."""
+    _commit_listeners.append(listener)
+    return listener
+
+def _user_id(transaction) -> int:
+    return transaction["user_id"] if isinstance(transaction, Mapping) else transaction.user_id
+
+def get_data_version(db: Session, user_id: int) -> int:
+    """Current version of a user's transaction data, for keying derived caches."""
+    return db.query(User.data_version).filter(User.id == user_id).scalar() or 0
+
+def bump_data_versions(db: Session, user_ids: Set[int]):
+    """Mark these users' derived data (forecasts, summaries) as out of date."""
+    db.execute(
+        update(User).where(User.id.in_(user_ids)).values(data_version=User.data_version + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+def record_changes(db: Session, transactions: Iterable, sign: int = 1):
+    """Apply every write-time side effect for added (sign=1) or removed (sign=-1) rows.
+
+    Runs inside the caller's database transaction, so rollups, budget
+    counters, anomaly baselines, alerts and data versions commit or roll
+    back together with the rows themselves.
+    Post-commit listeners fire only once the caller commits.
+    """
+    transactions = list(transactions)
+    if not transactions:
+        return
+    rollup_service.apply_transactions(db, transactions, sign)
+    budget_service.apply_transactions(db, transactions, sign)
+    anomaly_service.apply_transactions(db, transactions, sign)
+    _mark_changed(db, {_user_id(transaction) for transaction in transactions})
+
+def record_update(db: Session, before: Mapping, after):
+    """Apply the side effects of editing one transaction.
+
+    ``before`` is a snapshot of the row before the edit (with user_id) and
+    ``after`` the edited row. Budget deltas are netted across the two, so
+    an edit that leaves a budget's month and amount alone moves nothing
+    and re-raises no alerts, and the edited expense is never re-scored
+    for anomalies.
+    """
+    rollup_service.apply_transactions(db, [before], -1)
+    rollup_service.apply_transactions(db, [after])
+    budget_service.apply_changes(db, [(-1, before), (1, after)])
+    anomaly_service.apply_update(db, before, after)
+    _mark_changed(db, {_user_id(before), _user_id(after)})
+
+def _mark_changed(db: Session, user_ids: Set[int]):
+    bump_data_versions(db, user_ids)
+    db.info.setdefault("changed_user_ids", set()).update(user_ids)
+
+@event.listens_for(Session, "after_commit")
+def _notify_commit(session: Session):
+    user_ids = session.info.pop("changed_user_ids", None)
+    if user_ids:
+        for listener in _commit_listeners:
+            listener(user_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop("changed_user_ids", None)
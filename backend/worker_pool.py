@@ -0,0 +1,120 @@
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class WorkerPool:
+    """Bounded process pool for CPU-heavy jobs with per-job timeouts.
+
+    At most ``workers + queue_size`` jobs are in flight; beyond that callers
+    are turned away immediately instead of queueing behind slow jobs. A job
+    that times out is cancelled if it has not started yet; a running job
+    cannot be interrupted and keeps its slot until it finishes.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int, timeout: float, initializer=None):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.failures = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the API process holds threads and pooled DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+        return self._executor
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                self.cancelled += 1
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Drop a broken executor so the next job starts a fresh pool. Call with the lock held."""
+        if self._executor is executor:
+            self._executor = None
+        self.failures += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                return None, None
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool for the next job
+                self._discard(executor)
+                return None, None
+            self._in_flight += 1
+        future.add_done_callback(self._release)
+        return executor, future
+
+    def submit(self, fn, *args) -> Optional[Future]:
+        """Queue a job, or return None when the pool is saturated."""
+        return self._submit(fn, *args)[1]
+
+    def run(self, fn, *args, timeout: Optional[float] = None):
+        """Run a job and wait for it; None if it was rejected, failed or timed out."""
+        executor, future = self._submit(fn, *args)
+        if future is None:
+            return None
+        try:
+            result = future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            return None
+        except BrokenProcessPool:
+            with self._lock:
+                self._discard(executor)
+            return None
+        except Exception:
+            logger.exception("%s job failed", self.name)
+            with self._lock:
+                self.failures += 1
+            return None
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def shutdown(self):
+        """Stop the workers, dropping jobs that have not started."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "failures": self.failures,
+            }